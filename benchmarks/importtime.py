@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Import time of justamodel modules as reported by python -X importtime.
+
+Usage::
+
+    python benchmarks/importtime.py                          # print results
+    python benchmarks/importtime.py --save baseline.json     # save results as a baseline
+    python benchmarks/importtime.py --compare baseline.json  # compare with a baseline, exit 1 on regressions
+
+Modules are imported in fresh interpreters with a warm bytecode cache. Each module reports the best
+cumulative import time in microseconds (including modules it imports first), 'total' is the best time of
+all imports of the interpreter, including its own start-up.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ['justamodel.model', 'justamodel.types', 'justamodel.serializer']
+
+
+def import_times(modules, env):
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+                            env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    times = OrderedDict()
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total += int(cumulative)
+        name = name.strip()
+        if name == 'justamodel' or name.startswith('justamodel.'):
+            times[name] = int(cumulative)
+    times['total'] = total
+    return times
+
+
+def run(modules, repeat):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTHONPYCACHEPREFIX=cache_dir)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        import_times(modules, env)  # Fills the bytecode cache
+
+        results = OrderedDict()
+        for _ in range(repeat):
+            for name, value in import_times(modules, env).items():
+                results[name] = min(results.get(name, value), value)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            print('{:32} {:>10} us   (new)'.format(name, value))
+            continue
+        ratio = value / baseline[name] if baseline[name] else 1.0
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print('{:32} {:>10} us {:>+7.1%}{}'.format(name, value, ratio - 1, '   REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES,
+                        help='modules to import (default {})'.format(' '.join(DEFAULT_MODULES)))
+    parser.add_argument('--save', metavar='PATH', help='save results to a baseline file')
+    parser.add_argument('--compare', metavar='PATH', help='compare results with a baseline file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative slowdown when comparing (default 0.2)')
+    parser.add_argument('--repeat', type=int, default=20, help='number of measured imports')
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repeat)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('{} import(s) regressed by more than {:.0%}'.format(len(regressions), args.threshold))
+            status = 1
+    else:
+        for name, value in results.items():
+            print('{:32} {:>10} us'.format(name, value))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmarks of model construction, validation and serialization.
+
+Usage::
+
+    python benchmarks/run.py                          # print results
+    python benchmarks/run.py --save baseline.json     # save results as a baseline
+    python benchmarks/run.py --compare baseline.json  # compare with a baseline, exit 1 on regressions
+
+Each benchmark reports the best time per operation and the peak memory allocated by one operation
+as measured by tracemalloc.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from justamodel.model import Model, Field, PolymorphicModel  # noqa: E402
+from justamodel.serializer import DictModelSerializer, JsonModelSerializer  # noqa: E402
+from justamodel.types import StringType, IntType, BooleanType, ListType, DictType, ModelType  # noqa: E402
+
+
+class Flat(Model):
+    name = Field(StringType(min_length=1, max_length=100))
+    description = Field(StringType(), required=False)
+    count = Field(IntType(min_value=0))
+    price = Field(IntType())
+    active = Field(BooleanType())
+    tags = Field(ListType(StringType()))
+    attributes = Field(DictType(StringType(), StringType()))
+
+
+Wide = type('Wide', (Model,), OrderedDict(
+    [('field{}'.format(i), Field(StringType(), required=False)) for i in range(150)] +
+    [('number{}'.format(i), Field(IntType(), required=False)) for i in range(50)]
+))
+
+
+class Node(Model):
+    name = Field(StringType())
+    child = Field(ModelType(__name__ + '.Node'), required=False)
+
+
+class ListHeavy(Model):
+    items = Field(ListType(ModelType(Flat)))
+    values = Field(ListType(IntType()))
+
+
+class Circle(Model):
+    radius = Field(IntType())
+
+
+class Square(Model):
+    side = Field(IntType())
+
+
+class Shape(PolymorphicModel):
+    types_to_model_classes = {
+        'circle': Circle,
+        'square': Square,
+    }
+
+
+class Drawing(Model):
+    shapes = Field(ListType(ModelType(Shape)))
+
+
+def make_flat(i=0):
+    return Flat(name='item{}'.format(i), description='An item', count=i, price=i * 100, active=True,
+                tags=['a', 'b', 'c'], attributes={'colour': 'red', 'size': 'large'})
+
+
+def make_wide():
+    values = {'field{}'.format(i): 'value{}'.format(i) for i in range(0, 150, 10)}
+    values.update({'number{}'.format(i): i for i in range(0, 50, 10)})
+    return Wide(**values)
+
+
+def make_deep(depth=50):
+    node = None
+    for i in range(depth):
+        node = Node(name='node{}'.format(i), child=node)
+    return node
+
+
+def make_list_heavy():
+    return ListHeavy(items=[make_flat(i) for i in range(200)], values=list(range(10000)))
+
+
+def make_drawing():
+    return Drawing(shapes=[Circle(radius=i) if i % 2 else Square(side=i) for i in range(500)])
+
+
+SCHEMAS = OrderedDict([
+    ('flat', (Flat, make_flat)),
+    ('wide', (Wide, make_wide)),
+    ('deep', (Node, make_deep)),
+    ('list_heavy', (ListHeavy, make_list_heavy)),
+    ('polymorphic', (Drawing, make_drawing)),
+])
+
+
+def make_benchmarks():
+    dict_serializer = DictModelSerializer()
+    json_serializer = JsonModelSerializer()
+    benchmarks = OrderedDict()
+    for schema_name, (model_class, factory) in SCHEMAS.items():
+        model = factory()
+        data = dict_serializer.serialize_model(model)
+        json_data = json_serializer.serialize_model(model)
+
+        benchmarks[schema_name + '.init'] = factory
+        benchmarks[schema_name + '.validate'] = model.validate
+        benchmarks[schema_name + '.dict_serialize'] = lambda m=model: dict_serializer.serialize_model(m)
+        benchmarks[schema_name + '.dict_deserialize'] = \
+            lambda d=data, c=model_class: dict_serializer.deserialize_model(d, c)
+        benchmarks[schema_name + '.json_serialize'] = lambda m=model: json_serializer.serialize_model(m)
+        benchmarks[schema_name + '.json_deserialize'] = \
+            lambda d=json_data, c=model_class: json_serializer.deserialize_model(d, c)
+    return benchmarks
+
+
+def measure_time(func, min_time, repeat):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def measure_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(pattern=None, min_time=0.05, repeat=5):
+    results = OrderedDict()
+    for name, func in make_benchmarks().items():
+        if pattern is not None and pattern not in name:
+            continue
+        results[name] = {
+            'time': measure_time(func, min_time, repeat),
+            'memory': measure_memory(func),
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print('{:32} {:>12.1f} us {:>12} B   (new)'.format(name, result['time'] * 1e6, result['memory']))
+            continue
+        time_ratio = result['time'] / baseline[name]['time']
+        memory_ratio = result['memory'] / baseline[name]['memory'] if baseline[name]['memory'] else 1.0
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print('{:32} {:>12.1f} us {:>+7.1%} {:>12} B {:>+7.1%}{}'.format(
+            name, result['time'] * 1e6, time_ratio - 1, result['memory'], memory_ratio - 1,
+            '   REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', metavar='PATH', help='save results to a baseline file')
+    parser.add_argument('--compare', metavar='PATH', help='compare results with a baseline file')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative slowdown or memory increase when comparing (default 0.1)')
+    parser.add_argument('--filter', metavar='TEXT', help='run only benchmarks with TEXT in their name')
+    parser.add_argument('--min-time', type=float, default=0.05, help='minimal duration of one measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements per benchmark')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.min_time, args.repeat)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('{} benchmark(s) regressed by more than {:.0%}'.format(len(regressions), args.threshold))
+            status = 1
+    else:
+        for name, result in results.items():
+            print('{:32} {:>12.1f} us {:>12} B'.format(name, result['time'] * 1e6, result['memory']))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
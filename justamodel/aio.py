@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from functools import partial
+
+
+class AsyncModelSerializer:
+    """Runs a ModelSerializer without blocking the event loop.
+
+    Serialization, deserialization and validation run in an executor (the loop's default one unless
+    specified). Serialized input not longer than inline_limit is deserialized directly in the loop, where it
+    is cheaper than a round trip through the executor.
+    """
+
+    def __init__(self, serializer, executor=None, inline_limit=16384):
+        self.serializer = serializer
+        self.executor = executor
+        self.inline_limit = inline_limit
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def serialize_model(self, value, model_type=None, **kwargs):
+        return await self._run(self.serializer.serialize_model, value, model_type, **kwargs)
+
+    async def deserialize_model(self, value, model_or_model_type, **kwargs):
+        if isinstance(value, (str, bytes, bytearray, memoryview)) and len(value) <= self.inline_limit:
+            return self.serializer.deserialize_model(value, model_or_model_type, **kwargs)
+        return await self._run(self.serializer.deserialize_model, value, model_or_model_type, **kwargs)
+
+    async def validate(self, model):
+        await self._run(model.validate)
+
+    async def read_model(self, reader, model_or_model_type, length=None, **kwargs):
+        if length is None:
+            data = await reader.read()
+        else:
+            data = await reader.readexactly(length)
+        return await self.deserialize_model(data, model_or_model_type, **kwargs)
+
+    async def write_model(self, writer, value, model_type=None, **kwargs):
+        data = await self.serialize_model(value, model_type, **kwargs)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        writer.write(data)
+        await writer.drain()
+        return len(data)
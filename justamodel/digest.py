@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Content digests of model trees.
+
+The digest is computed from a canonical byte stream of model fields fed directly into a hashlib hasher.
+Every value is encoded as a type tag followed by length prefixed data, sets and dicts are encoded in
+a canonical order and nested models contribute their own digest, so digests of frozen and cached models
+can be memoized without changing the result.
+"""
+import hashlib
+import struct
+from datetime import datetime, date, time
+from .model import Model, get_cached_serialization, set_cached_serialization, caches_serialization
+
+_LENGTH = struct.Struct('<Q')
+_FLOAT = struct.Struct('<d')
+
+
+def digest(model, algorithm='sha256'):
+    if not isinstance(model, Model):
+        raise TypeError('Value is not an instance of Model')
+
+    memoize = model.frozen or caches_serialization(type(model))
+    if memoize:
+        cache_key = ('digest', algorithm)
+        result = get_cached_serialization(model, cache_key)
+        if result is not None:
+            return result
+
+    hasher = hashlib.new(algorithm)
+    model_class = type(model)
+    _update(hasher, b'M', '{}.{}'.format(model_class.__module__, model_class.__qualname__).encode('utf-8'))
+    for name in model_class.fields.keys():
+        _update(hasher, b'F', name.encode('utf-8'))
+        _update_value(hasher, getattr(model, name), algorithm)
+    result = hasher.digest()
+
+    if memoize:
+        set_cached_serialization(model, cache_key, result)
+    return result
+
+
+def hexdigest(model, algorithm='sha256'):
+    return digest(model, algorithm).hex()
+
+
+def _update(hasher, tag, data):
+    hasher.update(tag)
+    hasher.update(_LENGTH.pack(len(data)))
+    hasher.update(data)
+
+
+def _item_digest(value, algorithm):
+    hasher = hashlib.new(algorithm)
+    _update_value(hasher, value, algorithm)
+    return hasher.digest()
+
+
+def _update_value(hasher, value, algorithm):
+    if value is None:
+        hasher.update(b'N')
+    elif value is True:
+        hasher.update(b'T')
+    elif value is False:
+        hasher.update(b'F')
+    elif isinstance(value, str):
+        _update(hasher, b'S', value.encode('utf-8', 'surrogatepass'))
+    elif isinstance(value, int):
+        _update(hasher, b'I', str(value).encode('ascii'))
+    elif isinstance(value, float):
+        hasher.update(b'D')
+        hasher.update(_FLOAT.pack(value))
+    elif isinstance(value, Model):
+        _update(hasher, b'M', digest(value, algorithm))
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'L')
+        hasher.update(_LENGTH.pack(len(value)))
+        for item in value:
+            _update_value(hasher, item, algorithm)
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(b'E')
+        hasher.update(_LENGTH.pack(len(value)))
+        for item_digest in sorted(_item_digest(item, algorithm) for item in value):
+            hasher.update(item_digest)
+    elif isinstance(value, dict):
+        hasher.update(b'O')
+        hasher.update(_LENGTH.pack(len(value)))
+        for key_digest, item_value in sorted(((_item_digest(key, algorithm), item_value)
+                                              for key, item_value in value.items()), key=lambda x: x[0]):
+            hasher.update(key_digest)
+            _update_value(hasher, item_value, algorithm)
+    elif isinstance(value, (bytes, bytearray)):
+        _update(hasher, b'B', value)
+    elif isinstance(value, (datetime, date, time)):
+        _update(hasher, b'C', '{}:{}'.format(type(value).__name__, value.isoformat()).encode('ascii'))
+    else:
+        raise TypeError('Cannot compute digest of {!r}'.format(value))
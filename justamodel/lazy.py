@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Modules imported when they are used first, to keep `import justamodel` cheap."""
+import sys
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_LazyModule__name'] = name
+
+    def __getattr__(self, name):
+        # Only called for attributes not copied to the proxy yet
+        module = sys.modules.get(self.__name)
+        if module is None:
+            __import__(self.__name)
+            module = sys.modules[self.__name]
+        value = getattr(module, name)
+        self.__dict__[name] = value
+        return value
+
+    def __repr__(self):  # pragma: no cover
+        return 'LazyModule({!r})'.format(self.__name)
+
+
+def lazy_import(name):
+    return LazyModule(name)
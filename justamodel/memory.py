@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Memory used by model trees.
+
+deep_sizeof adds up sys.getsizeof of a value and everything reachable from it through model fields,
+containers and other instance attributes of models (like cached serializations). Objects reachable more
+than once are counted once, a set of already counted ids can be passed to count several trees together.
+None, True and False are shared by the interpreter and not counted.
+"""
+import sys
+from collections import OrderedDict
+from .model import Model
+
+
+def deep_sizeof(value, seen=None):
+    if seen is None:
+        seen = set()
+    return _sizeof(value, seen)
+
+
+def memory_usage(model, seen=None):
+    if not isinstance(model, Model):
+        raise TypeError('Value is not an instance of Model')
+    if seen is None:
+        seen = set()
+
+    values = model.__dict__
+    instance = 0
+    if id(model) not in seen:
+        seen.add(id(model))
+        instance = sys.getsizeof(model) + sys.getsizeof(values)
+    fields = OrderedDict()
+    for name in model.fields.keys():
+        # Lazy defaults which were not created yet use no memory
+        fields[name] = _sizeof(values.get(name), seen)
+    for name, value in values.items():
+        if name not in fields:
+            instance += _sizeof(value, seen)
+    return OrderedDict([('total', instance + sum(fields.values())), ('instance', instance), ('fields', fields)])
+
+
+def _sizeof(value, seen):
+    total = 0
+    # Explicit stack, deep trees would exceed the recursion limit
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if value is None or value is True or value is False or id(value) in seen:
+            continue
+        seen.add(id(value))
+        total += sys.getsizeof(value)
+        if isinstance(value, Model):
+            values = value.__dict__
+            total += sys.getsizeof(values)
+            stack.extend(values.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+    return total
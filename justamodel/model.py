@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 from collections import OrderedDict
+from time import perf_counter
+from . import profiling
 from .exceptions import ValidationError, ModelValidationError
+from .lazy import lazy_import
 from abc import ABCMeta
 
+weakref = lazy_import('weakref')
+
 
 class _SpecialConstant:  # pragma: no cover
     def __init__(self, name):
@@ -38,6 +43,11 @@ class Field:
         else:
             return self.default
 
+    def freeze(self, value):
+        if value is None:
+            return None
+        return self.type.freeze(value)
+
     def validate(self, value):
         if value is None:
             if self.required:
@@ -68,10 +78,16 @@ class ModelMeta(type):
 
         cls = super().__new__(mcls, name, bases, new_namespace)
 
-        merged_fields = OrderedDict()
-        for part_cls in (part_cls for part_cls in reversed(cls.mro()) if hasattr(part_cls, 'declared_fields')):
-            for key, field in part_cls.declared_fields.items():
-                merged_fields[key] = field
+        if len(bases) == 1 and getattr(bases[0], 'fields', None) is not None:
+            # Fields of a single model base are already merged
+            merged_fields = OrderedDict(bases[0].fields)
+            merged_fields.update(declared_fields)
+        else:
+            merged_fields = OrderedDict()
+            for part_cls in reversed(cls.__mro__):
+                part_fields = part_cls.__dict__.get('declared_fields')
+                if part_fields is not None:
+                    merged_fields.update(part_fields)
 
         cls.fields = merged_fields
 
@@ -80,29 +96,76 @@ class ModelMeta(type):
 
 class Model(metaclass=ModelMeta):
     fields = None
+    lazy_defaults = False
+    frozen = False
+    cache_serialized = False
 
     def __init__(self, **kwargs):
         for name, field in self.fields.items():
             if name in kwargs:
                 setattr(self, name, kwargs[name])
-            else:
+            elif not self.lazy_defaults:
                 setattr(self, name, field.create_default_value())
 
+    @classmethod
+    def construct(cls, **kwargs):
+        # Creates an instance from trusted values, e.g. data written by this application. Values are neither
+        # validated nor copied, defaults are only created for missing fields.
+        self = cls.__new__(cls)
+        values = self.__dict__
+        lazy_defaults = cls.lazy_defaults
+        for name, field in cls.fields.items():
+            if name in kwargs:
+                values[name] = kwargs[name]
+            elif not lazy_defaults:
+                values[name] = field.create_default_value()
+        return self
+
+    def __getattr__(self, name):
+        # Only called when the attribute is not set, i.e. a default that was not created yet
+        cls = type(self)
+        if cls.lazy_defaults and name in cls.fields:
+            field = cls.fields[name]
+            value = field.create_default_value()
+            if cls.frozen:
+                value = field.freeze(value)
+            object.__setattr__(self, name, value)
+            return value
+        raise AttributeError('{!r} object has no attribute {!r}'.format(cls.__qualname__, name))
+
     def validate(self):
         error = ModelValidationError()
+        profiler = profiling.validation_profiler.get()
         for name, field in self.fields.items():
+            value = getattr(self, name)
+            if profiler is not None:
+                start = perf_counter()
             try:
-                field.validate(getattr(self, name))
+                field.validate(value)
             except ValidationError as field_error:
                 error.add_sub_error(name, field_error)
+            if profiler is not None:
+                profiler.add('validate', type(self), field, perf_counter() - start, value)
         if error:
             raise error
 
+    def __reduce__(self):
+        # Field values are pickled by position instead of the instance dict, so field names are not repeated
+        # for every instance. Missing lazy defaults are stored as Ellipsis, caches are not pickled.
+        values = self.__dict__
+        args = (type(self), tuple([values.get(name, Ellipsis) for name in self.fields]))
+        state = _extra_state(self)
+        if state:
+            return _restore_model, args, state
+        return _restore_model, args
+
     def __eq__(self, other):
         if type(self) != type(other):
             return NotImplemented
         for name in self.fields.keys():
-            if not (getattr(self, name) == getattr(other, name)):
+            value = getattr(self, name)
+            other_value = getattr(other, name)
+            if value is not other_value and not (value == other_value):
                 return False
         return True
 
@@ -119,6 +182,227 @@ class Model(metaclass=ModelMeta):
         return '{}({})'.format(type(self).__qualname__, field_descr)
 
 
+class FrozenModel(Model):
+    frozen = True
+
+    def __init__(self, **kwargs):
+        for name, field in self.fields.items():
+            if name in kwargs:
+                object.__setattr__(self, name, field.freeze(kwargs[name]))
+            elif not self.lazy_defaults:
+                object.__setattr__(self, name, field.freeze(field.create_default_value()))
+
+    @classmethod
+    def construct(cls, **kwargs):
+        self = super().construct(**kwargs)
+        values = self.__dict__
+        for name, field in cls.fields.items():
+            if name in values:
+                values[name] = field.freeze(values[name])
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} instances are frozen'.format(type(self).__qualname__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} instances are frozen'.format(type(self).__qualname__))
+
+    def __hash__(self):
+        # Computed once, nested frozen models would be hashed again for every parent otherwise
+        result = self.__dict__.get('_hash')
+        if result is None:
+            result = hash((type(self),) + tuple(getattr(self, name) for name in self.fields.keys()))
+            object.__setattr__(self, '_hash', result)
+        return result
+
+    def validate(self):
+        # Frozen models cannot change, so a successful validation stays valid
+        if self.__dict__.get('_validated', False):
+            return
+        super().validate()
+        object.__setattr__(self, '_validated', True)
+
+
+class CachedModel(Model):
+    cache_serialized = True
+
+    @classmethod
+    def construct(cls, **kwargs):
+        self = super().construct(**kwargs)
+        self._link_fields()
+        return self
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        field = self.fields.get(name)
+        if field is not None:
+            self._link_models(field, value)
+            self.invalidate_cache()
+
+    def _link_models(self, field, value):
+        for model in field.type.iter_models(value):
+            if isinstance(model, CachedModel):
+                model.__dict__.setdefault('_parents', {})[id(self)] = weakref.ref(self)
+
+    def _link_fields(self):
+        values = self.__dict__
+        for name, field in self.fields.items():
+            if name in values:
+                self._link_models(field, values[name])
+
+    def __delattr__(self, name):
+        object.__delattr__(self, name)
+        if name in self.fields:
+            self.invalidate_cache()
+
+    def invalidate_cache(self):
+        # Models containing this one are only cached if this one is, so the propagation can stop here
+        cache = self.__dict__.get('_serialized_cache')
+        if not cache:
+            return
+        cache.clear()
+        for parent_ref in list(self.__dict__.get('_parents', {}).values()):
+            parent = parent_ref()
+            if parent is not None:
+                parent.invalidate_cache()
+
+
+def _uses_default_validate(model_class):
+    return model_class.validate is Model.validate or model_class.validate is FrozenModel.validate
+
+
+def validate_iterative(model):
+    # Validates model like Model.validate, but walks nested models and containers with an explicit stack, so that
+    # deep trees do not hit the recursion limit. Models overriding validate are validated by calling it, validated
+    # frozen models are skipped. Validation profiling is not supported.
+    if not _uses_default_validate(type(model)):
+        return model.validate()
+
+    error = ModelValidationError()
+    stack = [((), model, None)]
+    while stack:
+        path, value, value_type = stack.pop()
+        if value_type is not None:
+            try:
+                if not value_type.contains_models:
+                    value_type.validate(value)
+                    continue
+                value_type.validate_shallow(value)
+            except ValidationError as e:
+                error.add_path_error(e, *path)
+                continue
+
+        if isinstance(value, Model):
+            if value.__dict__.get('_validated', False):
+                continue
+            if not _uses_default_validate(type(value)):
+                try:
+                    value.validate()
+                except ValidationError as e:
+                    error.add_path_error(e, *path)
+                continue
+            items = []
+            for name, field in value.fields.items():
+                field_value = getattr(value, name)
+                if field_value is not None:
+                    items.append((path + (name,), field_value, field.type))
+                elif field.required:
+                    try:
+                        field.validate(None)
+                    except ValidationError as e:
+                        error.add_path_error(e, *(path + (name,)))
+        else:
+            items = [(path + item_path, item, item_type)
+                     for item_path, item, item_type in value_type.iter_items(value) if item_type is not None]
+        stack.extend(reversed(items))
+
+    if error:
+        raise error
+
+
+# Instance attributes holding caches, which are not pickled
+_TRANSIENT_ATTRIBUTES = frozenset(('_validated', '_hash', '_serialized_cache', '_parents'))
+
+
+def _extra_state(model):
+    fields = model.fields
+    return {name: value for name, value in model.__dict__.items()
+            if name not in fields and name not in _TRANSIENT_ATTRIBUTES}
+
+
+def _restore_model(model_class, values):
+    return model_class.construct(**{name: value for name, value in zip(model_class.fields, values)
+                                    if value is not Ellipsis})
+
+
+def _restore_batch(model_class, columns):
+    return ModelBatch([_restore_model(model_class, values) for values in zip(*columns)])
+
+
+class ModelBatch(list):
+    """List of models pickled as their class and a list of values of each field.
+
+    Lists of models of one class pickle more compactly and faster this way. Other lists are pickled like
+    plain lists.
+    """
+
+    def __reduce__(self):
+        model_class = type(self[0]) if self else None
+        if (model_class is None or not issubclass(model_class, Model) or
+                any(type(model) is not model_class or _extra_state(model) for model in self)):
+            return type(self), (list(self),)
+        columns = [[model.__dict__.get(name, Ellipsis) for model in self] for name in model_class.fields]
+        return _restore_batch, (model_class, columns)
+
+
+def get_cached_serialization(model, key):
+    cache = model.__dict__.get('_serialized_cache')
+    if cache is None:
+        return None
+    return cache.get(key)
+
+
+def set_cached_serialization(model, key, value):
+    cache = model.__dict__.setdefault('_serialized_cache', {})
+    if not cache and isinstance(model, CachedModel):
+        # Nested models added in place, e.g. appended to a list, are linked when the cache is filled again
+        model._link_fields()
+    cache[key] = value
+
+
+_caches_serialization = {}
+
+
+def caches_serialization(model_class):
+    # Serializations are only cached when every model reachable through the field types is cached or frozen,
+    # changes of other models would not invalidate the cache. Computed on first use, as model types can be
+    # referred to by name.
+    try:
+        return _caches_serialization[model_class]
+    except KeyError:
+        pass
+
+    result = model_class.cache_serialized
+    seen = set()
+    pending = [model_class]
+    while result and pending:
+        nested_class = pending.pop()
+        if nested_class in seen:
+            continue
+        seen.add(nested_class)
+        if hasattr(nested_class, 'types_to_model_classes'):
+            pending.extend(nested_class.types_to_model_classes.values())
+        elif not nested_class.frozen:
+            if not nested_class.cache_serialized:
+                result = False
+            for field in nested_class.fields.values():
+                if field.type is not None:
+                    pending.extend(field.type.iter_model_types())
+
+    _caches_serialization[model_class] = result
+    return result
+
+
 class PolymorphicModelMeta(ABCMeta):
     def __new__(mcs, name, bases, namespace):
         for klass in bases:
@@ -164,6 +448,11 @@ def get_model_class_for_type(model_type, type_name):
     if not hasattr(model_type, 'get_model_class_for_type'):
         return model_type
 
+    try:
+        hash(type_name)
+    except TypeError:
+        # Type names come from serialized input, which can contain any value
+        raise ValidationError('{!r} is not in allowed types'.format(type_name))
     model_class = model_type.get_model_class_for_type(type_name)
 
     if model_class is None:
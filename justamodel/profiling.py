@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from collections.abc import Sized
+from contextvars import ContextVar
+
+# Profiler used by Model.validate, see profile_validation. A context variable so threads and tasks
+# validating at the same time do not record into each other's profiler
+validation_profiler = ContextVar('validation_profiler', default=None)
+
+
+class Stats:
+    __slots__ = ('calls', 'time', 'items')
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.items = 0
+
+    def add(self, elapsed, items):
+        self.calls += 1
+        self.time += elapsed
+        self.items += items
+
+    def as_dict(self):
+        return {'calls': self.calls, 'time': self.time, 'items': self.items}
+
+
+def count_items(value):
+    if isinstance(value, Sized):
+        return len(value)
+    return 1
+
+
+class Profiler:
+    def __init__(self):
+        self.fields = OrderedDict()
+        self.types = OrderedDict()
+
+    def reset(self):
+        self.fields.clear()
+        self.types.clear()
+
+    def add(self, operation, model_class, field, elapsed, value):
+        items = count_items(value)
+
+        key = (operation, model_class, field.name)
+        stats = self.fields.get(key)
+        if stats is None:
+            stats = self.fields[key] = Stats()
+        stats.add(elapsed, items)
+
+        key = (operation, type(field.type))
+        stats = self.types.get(key)
+        if stats is None:
+            stats = self.types[key] = Stats()
+        stats.add(elapsed, items)
+
+    def as_dict(self):
+        result = OrderedDict()
+        for (operation, model_class, field_name), stats in self.fields.items():
+            fields = result.setdefault(operation, OrderedDict()).setdefault('fields', OrderedDict())
+            fields.setdefault(model_class.__qualname__, OrderedDict())[field_name] = stats.as_dict()
+        for (operation, type_class), stats in self.types.items():
+            types = result.setdefault(operation, OrderedDict()).setdefault('types', OrderedDict())
+            types[type_class.__qualname__] = stats.as_dict()
+        return result
+
+
+class profile_validation:
+    # Context manager setting the profiler used by Model.validate, a class to avoid importing contextlib
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.token = None
+
+    def __enter__(self):
+        self.token = validation_profiler.set(self.profiler)
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        validation_profiler.reset(self.token)
+        self.token = None
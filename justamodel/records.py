@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Read-only record files of serialized models.
+
+A record file stores JSON serialized models back to back, followed by an index of record offsets
+and an optional sorted key index::
+
+    header      MAGIC, format version
+    records     serialized models, back to back
+    offsets     (count + 1) x uint64, offset of each record and end of the last one
+    keys        encoded keys back to back, in key order
+    key_offsets (key_count + 1) x uint64, offset of each key and end of the last one
+    key_records key_count x uint64, record index of each key
+    footer      count, key_count, offsets position, keys position, key offsets position,
+                key records position, MAGIC
+
+All integers are little endian. The reader maps the file into memory and only deserializes
+records that are accessed.
+"""
+import mmap
+import struct
+from .exceptions import ValidationError
+from .serializer import JsonModelSerializer
+
+MAGIC = b'JAMR'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sI')
+_FOOTER = struct.Struct('<6Q4s')
+_OFFSET = struct.Struct('<Q')
+
+
+class RecordWriter:
+    def __init__(self, file, serializer=None):
+        self.file = file
+        self.serializer = serializer if serializer is not None else JsonModelSerializer()
+        self.offsets = []
+        self.keys = {}
+        self.closed = False
+        self.file.write(_HEADER.pack(MAGIC, VERSION))
+        self.position = _HEADER.size
+
+    def write(self, model, model_type=None, key=None):
+        if self.closed:
+            raise ValueError('Record writer is closed')
+        if key is not None:
+            if not isinstance(key, str):
+                raise TypeError('Record key must be a string')
+            if key in self.keys:
+                raise ValueError('Duplicate record key {!r}'.format(key))
+            self.keys[key] = len(self.offsets)
+
+        data = self.serializer.serialize_model(model, model_type).encode('utf-8')
+        self.offsets.append(self.position)
+        self.file.write(data)
+        self.position += len(data)
+        return len(self.offsets) - 1
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        offsets_position = self.position
+        self.offsets.append(self.position)
+        self._write_offsets(self.offsets)
+
+        keys_position = self.position
+        key_offsets = []
+        key_records = []
+        for encoded_key, index in sorted((key.encode('utf-8'), index) for key, index in self.keys.items()):
+            key_offsets.append(self.position)
+            key_records.append(index)
+            self.file.write(encoded_key)
+            self.position += len(encoded_key)
+        key_offsets.append(self.position)
+
+        key_offsets_position = self.position
+        self._write_offsets(key_offsets)
+        key_records_position = self.position
+        self._write_offsets(key_records)
+
+        self.file.write(_FOOTER.pack(len(self.offsets) - 1, len(key_records), offsets_position, keys_position,
+                                     key_offsets_position, key_records_position, MAGIC))
+
+    def _write_offsets(self, values):
+        data = struct.pack('<{}Q'.format(len(values)), *values)
+        self.file.write(data)
+        self.position += len(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Without the footer readers reject the file instead of taking it for a complete one
+            self.closed = True
+
+
+def write_records(path, models, model_type=None, key=None, serializer=None):
+    with open(path, 'wb') as f, RecordWriter(f, serializer=serializer) as writer:
+        for model in models:
+            writer.write(model, model_type, key=key(model) if key is not None else None)
+
+
+class RecordReader:
+    def __init__(self, path, model_type, serializer=None, trusted=False):
+        self.model_type = model_type
+        self.trusted = trusted
+        self.serializer = serializer if serializer is not None else JsonModelSerializer()
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read_index()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_index(self):
+        if len(self._mmap) < _HEADER.size + _FOOTER.size:
+            raise ValidationError('File is too short to be a record file')
+        magic, version = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValidationError('File is not a record file')
+        if version != VERSION:
+            raise ValidationError('Unsupported record file version {}'.format(version))
+
+        (self._count, self._key_count, self._offsets_position, self._keys_position, self._key_offsets_position,
+         self._key_records_position, magic) = _FOOTER.unpack_from(self._mmap, len(self._mmap) - _FOOTER.size)
+        if magic != MAGIC:
+            raise ValidationError('Record file is truncated')
+
+    def _offset(self, table_position, index):
+        return _OFFSET.unpack_from(self._mmap, table_position + index * _OFFSET.size)[0]
+
+    def __len__(self):
+        return self._count
+
+    def _record_range(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('Record index out of range')
+        return self._offset(self._offsets_position, index), self._offset(self._offsets_position, index + 1)
+
+    def read_raw(self, index):
+        start, end = self._record_range(index)
+        return self._mmap[start:end]
+
+    def __getitem__(self, index):
+        start, end = self._record_range(index)
+        # Views of the map must be released before it can be closed
+        with memoryview(self._mmap) as view, view[start:end] as data:
+            return self.serializer.deserialize_model(data, self.model_type, trusted=self.trusted)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def _key_at(self, position):
+        start = self._offset(self._key_offsets_position, position)
+        end = self._offset(self._key_offsets_position, position + 1)
+        return self._mmap[start:end]
+
+    def find(self, key):
+        encoded_key = key.encode('utf-8')
+        low, high = 0, self._key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._key_count and self._key_at(low) == encoded_key:
+            return self._offset(self._key_records_position, low)
+        return None
+
+    def get(self, key, default=None):
+        index = self.find(key)
+        if index is None:
+            return default
+        return self[index]
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
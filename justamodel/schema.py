@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""Validation of serialized payloads and JSON Schema export.
+
+validate_payload checks a serialized (e.g. JSON decoded) payload against a model type without
+creating any models, reporting errors with the same paths as Model.validate. Leaf values that need
+conversion, like dates in JSON, are converted by the serializer before their validation.
+"""
+from collections import OrderedDict
+from collections.abc import Mapping
+from .exceptions import ValidationError, ModelValidationError
+from .model import get_type_specifier_name, get_model_class_for_type
+from .serializer import DictModelSerializer
+from .types import BooleanType, IntType, StringType, UrlType, ListType, SetType, DictType, ModelType, \
+    DateTimeType, DateType, TimeType
+
+
+def validate_payload(payload, model_type, serializer=None):
+    if serializer is None:
+        serializer = DictModelSerializer()
+    try:
+        _validate_model(payload, model_type, serializer)
+    except ModelValidationError:
+        raise
+    except ValidationError as e:
+        mve = ModelValidationError()
+        mve.__cause__ = e
+        mve.add_error(e)
+        raise mve
+
+
+def _validate_model(value, model_type, serializer):
+    if not isinstance(value, Mapping):
+        raise ValidationError('Model deserialization requires mapping type')
+
+    type_name = None
+    type_specifier_name = get_type_specifier_name(model_type)
+    if type_specifier_name is not None:
+        if type_specifier_name not in value:
+            raise ValidationError('Polymorphic model requires type specifier')
+        type_name = value[type_specifier_name]
+    model_class = get_model_class_for_type(model_type, type_name)
+
+    error = ModelValidationError()
+    for name, field in model_class.fields.items():
+        field_value = value.get(name)
+        try:
+            if field_value is None:
+                field.validate(None)
+            else:
+                _validate_value(field_value, field.type, serializer)
+        except ValidationError as field_error:
+            error.add_sub_error(name, field_error)
+    if error:
+        raise error
+
+
+def _validate_value(value, value_type, serializer):
+    if value_type is None:
+        return
+    if value is None:
+        value_type.validate(None)
+    elif isinstance(value_type, ModelType):
+        _validate_model(value, value_type.native_type, serializer)
+    elif isinstance(value_type, (ListType, SetType, DictType)) and (serializer.needs_conversion(value_type) or
+                                                                     _has_unhashable_items(value, value_type)):
+        _validate_container(value, value_type, serializer)
+    else:
+        _check_container(value, value_type)
+        value_type.validate(serializer.deserialize_value(value, value_type, trusted=True))
+
+
+def _check_container(value, value_type):
+    # Serialized containers are converted to the native type, which only works for some types
+    if isinstance(value_type, DictType):
+        if not isinstance(value, Mapping):
+            value_type.validate_shallow(value)
+    elif isinstance(value_type, (ListType, SetType)):
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            value_type.validate_shallow(value)
+
+
+def _has_unhashable_items(value, value_type):
+    # Sets of such items cannot be created, their items are validated one by one instead
+    if not isinstance(value_type, SetType) or not isinstance(value, (list, tuple)):
+        return False
+    try:
+        set(value)
+    except TypeError:
+        return True
+    return False
+
+
+def _check_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        raise ValidationError('{!r} is not hashable'.format(value))
+
+
+def _validate_container(value, value_type, serializer):
+    _check_container(value, value_type)
+    error = ModelValidationError()
+    if isinstance(value_type, DictType):
+        value_type.validate_shallow(value if isinstance(value, dict) else dict(value))
+        for item_key, item_value in value.items():
+            sub_error = ModelValidationError()
+            try:
+                _validate_value(item_key, value_type.key_type, serializer)
+            except ValidationError as e:
+                sub_error.add_sub_error('key', e)
+            try:
+                _validate_value(item_value, value_type.value_type, serializer)
+            except ValidationError as e:
+                sub_error.add_sub_error('value', e)
+            if sub_error:
+                error.add_sub_error(item_key, sub_error)
+    else:
+        is_set = isinstance(value_type, SetType)
+        native_type = value_type.native_type
+        try:
+            shell = value if isinstance(value, native_type) else native_type(value)
+        except TypeError:
+            # Serialized items of sets are not always hashable (e.g. models), their checks are left
+            # to deserialization
+            shell = None
+        if shell is not None:
+            value_type.validate_shallow(shell)
+        # Items that are converted, e.g. to frozen models, are hashed after their conversion only
+        check_hashable = is_set and shell is None and not serializer.needs_conversion(value_type.item_type)
+        for key, item in enumerate(value):
+            try:
+                _validate_value(item, value_type.item_type, serializer)
+                if check_hashable:
+                    _check_hashable(item)
+            except ValidationError as e:
+                error.add_sub_error(item if is_set and shell is not None else key, e)
+    if error:
+        raise error
+
+
+_DATETIME_SCHEMAS = {
+    'iso': {'type': 'string', 'format': 'date-time'},
+    'epoch': {'type': 'integer'},
+    'epoch_ms': {'type': 'integer'},
+}
+
+
+def json_schema(model_type, datetime_format='iso'):
+    if datetime_format not in _DATETIME_SCHEMAS:
+        raise ValueError('Unknown datetime format {!r}'.format(datetime_format))
+    definitions = OrderedDict()
+    schema = _SchemaBuilder(definitions, datetime_format).model_schema(model_type)
+    result = OrderedDict([('$schema', 'https://json-schema.org/draft/2020-12/schema')])
+    result.update(schema)
+    if definitions:
+        result['$defs'] = definitions
+    return result
+
+
+class _SchemaBuilder:
+    def __init__(self, definitions, datetime_format):
+        self.definitions = definitions
+        self.datetime_format = datetime_format
+        self._names = {}
+
+    def _definition_name(self, model_class):
+        name = self._names.get(model_class)
+        if name is None:
+            name = model_class.__qualname__
+            if name in self.definitions:
+                name = '{}.{}'.format(model_class.__module__, name)
+            self._names[model_class] = name
+        return name
+
+    def model_schema(self, model_type):
+        type_specifier_name = get_type_specifier_name(model_type)
+        if type_specifier_name is None:
+            return {'$ref': '#/$defs/' + self._define(model_type)}
+
+        variants = []
+        for type_name, model_class in model_type.types_to_model_classes.items():
+            variants.append({'allOf': [
+                {'$ref': '#/$defs/' + self._define(model_class)},
+                {'type': 'object', 'properties': {type_specifier_name: {'const': type_name}},
+                 'required': [type_specifier_name]},
+            ]})
+        return {'oneOf': variants}
+
+    def _define(self, model_class):
+        name = self._definition_name(model_class)
+        if name in self.definitions:
+            return name
+
+        properties = OrderedDict()
+        required = []
+        definition = self.definitions[name] = OrderedDict([('type', 'object'), ('properties', properties)])
+        for field_name, field in model_class.fields.items():
+            schema = self.value_schema(field.type)
+            if field.required:
+                required.append(field_name)
+            else:
+                schema = {'anyOf': [schema, {'type': 'null'}]}
+            properties[field_name] = schema
+        if required:
+            definition['required'] = required
+        return name
+
+    def value_schema(self, value_type):
+        if value_type is None:
+            return {}
+        if isinstance(value_type, ModelType):
+            return self.model_schema(value_type.native_type)
+
+        if isinstance(value_type, BooleanType):
+            schema = {'type': 'boolean'}
+        elif isinstance(value_type, IntType):
+            schema = {'type': 'integer'}
+        elif isinstance(value_type, StringType):
+            schema = {'type': 'string'}
+            if value_type.regex is not None:
+                schema['pattern'] = value_type.regex.pattern
+            if isinstance(value_type, UrlType):
+                schema['format'] = 'uri'
+        elif isinstance(value_type, DateTimeType):
+            schema = dict(_DATETIME_SCHEMAS[self.datetime_format])
+        elif isinstance(value_type, DateType):
+            schema = {'type': 'string', 'format': 'date'}
+        elif isinstance(value_type, TimeType):
+            schema = {'type': 'string', 'format': 'time'}
+        elif isinstance(value_type, (ListType, SetType)):
+            schema = {'type': 'array', 'items': self.value_schema(value_type.item_type)}
+            if isinstance(value_type, SetType):
+                schema['uniqueItems'] = True
+        elif isinstance(value_type, DictType):
+            schema = {'type': 'object', 'additionalProperties': self.value_schema(value_type.value_type)}
+            if isinstance(value_type.key_type, StringType):
+                schema['propertyNames'] = self.value_schema(value_type.key_type)
+        else:
+            return {}
+
+        self._add_limits(schema, value_type)
+        return schema
+
+    def _add_limits(self, schema, value_type):
+        min_length = getattr(value_type, 'min_length', None)
+        max_length = getattr(value_type, 'max_length', None)
+        if schema['type'] == 'string':
+            names = ('minLength', 'maxLength')
+        elif schema['type'] == 'array':
+            names = ('minItems', 'maxItems')
+        else:
+            names = ('minProperties', 'maxProperties')
+        if min_length is not None:
+            schema[names[0]] = min_length
+        if max_length is not None:
+            schema[names[1]] = max_length
+
+        if isinstance(value_type, IntType):
+            if value_type.min_value is not None:
+                schema['minimum'] = value_type.min_value
+            if value_type.max_value is not None:
+                schema['maximum'] = value_type.max_value
@@ -1,37 +1,255 @@
 # -*- coding: utf-8 -*-
 from abc import ABCMeta, abstractmethod
-import json
-import collections
-from collections.abc import Mapping
+from datetime import datetime, date, time, timedelta, timezone
+from time import perf_counter
+from collections import OrderedDict
+from collections.abc import Mapping, Container
 from .exceptions import ValidationError, ModelValidationError
-from .model import get_type_specifier_name, get_model_class_for_type, get_type_name_for_model, Model
-from .types import ModelType, StringType, BooleanType, IntType, ListType, SetType, DictType
+from .lazy import lazy_import
+from .model import get_type_specifier_name, get_model_class_for_type, get_type_name_for_model, Model, \
+    get_cached_serialization, set_cached_serialization, caches_serialization
+from .types import ValueType, ModelType, StringType, UrlType, BooleanType, IntType, ListType, SetType, DictType, \
+    DateTimeType, DateType, TimeType
+
+json = lazy_import('json')
 
 
 def make_field_filter(fields):
     if fields is None:
         return lambda x: True
-    if isinstance(fields, collections.Container):
+    if isinstance(fields, Container):
         return lambda x: x[0] in fields
     else:
         return fields
 
 
+class Projection:
+    """Compiled selection of fields of a model tree, see make_projection.
+
+    children maps field names to projections of their values, None meaning the whole value. A '*' child
+    applies to items of lists, sets and dict values, and to fields not listed explicitly. Names are applied
+    to items of containers that have no '*' child.
+    """
+
+    def __init__(self, children):
+        self.children = children
+        self._fields = {}
+        self._items = None
+
+    def iter_fields(self, model_class):
+        try:
+            return self._fields[model_class]
+        except KeyError:
+            pass
+
+        result = []
+        wildcard = '*' in self.children
+        for name, field in model_class.fields.items():
+            if name in self.children:
+                result.append((name, field, self.children[name]))
+            elif wildcard:
+                result.append((name, field, self.children['*']))
+        self._fields[model_class] = result
+        return result
+
+    def items(self):
+        if '*' not in self.children:
+            return self
+        if self._items is None:
+            items = self.children['*']
+            named = {name: child for name, child in self.children.items() if name != '*'}
+            if items is not None and named:
+                items = _merge_projections(items, Projection(named))
+            self._items = items
+        return self._items
+
+    def __repr__(self):  # pragma: no cover
+        return 'Projection({!r})'.format(self.children)
+
+
+def _merge_projections(a, b):
+    if a is None or b is None:
+        return None
+    children = dict(a.children)
+    for name, child in b.children.items():
+        children[name] = _merge_projections(children[name], child) if name in children else child
+    return Projection(children)
+
+
+def make_projection(paths):
+    root = {}
+    for path in paths:
+        node = root
+        parts = path.split('.')
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                break
+            node = child
+        else:
+            node[parts[-1]] = None
+
+    def compile_node(node):
+        if node is None:
+            return None
+        return Projection({name: compile_node(child) for name, child in node.items()})
+
+    return compile_node(root)
+
+
 def iter_model_fields(model_class, fields=None, **kwargs):
     items = model_class.fields.items()
     if fields is None:
         return items
+    if isinstance(fields, Projection):
+        return [(name, field) for name, field, _ in fields.iter_fields(model_class)]
 
     return filter(make_field_filter(fields), items)
 
 
+def _iter_field_kwargs(model_class, iter_fields, kwargs):
+    fields = kwargs.get('fields')
+    if isinstance(fields, Projection):
+        for name, field, child in fields.iter_fields(model_class):
+            yield name, field, dict(kwargs, fields=child)
+    else:
+        if fields is not None:
+            # Plain field filters select fields of this model only, nested models are (de)serialized in full
+            kwargs = {key: value for key, value in kwargs.items() if key != 'fields'}
+        for name, field in iter_fields:
+            yield name, field, kwargs
+
+
+def _item_kwargs(kwargs):
+    if 'fields' not in kwargs:
+        return kwargs
+    fields = kwargs['fields']
+    if isinstance(fields, Projection):
+        return dict(kwargs, fields=fields.items())
+    # Plain field filters apply to models, not to items of their containers
+    return {key: value for key, value in kwargs.items() if key != 'fields'}
+
+
+def _identity(value):
+    return value
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else list(value)
+
+
+def _as_set(value):
+    return value if isinstance(value, set) else set(value)
+
+
+def _as_dict(value):
+    return value if isinstance(value, dict) else dict(value)
+
+
+# Types whose values are returned unchanged unless _converts_type says otherwise. Subclasses of these types are
+# not included, their values go through serialize_value and deserialize_value of serializer subclasses.
+_LEAF_TYPES = frozenset((ValueType, BooleanType, StringType, UrlType, IntType, DateTimeType, DateType, TimeType))
+
+
+def _is_container(value_type):
+    return isinstance(value_type, (ListType, SetType, DictType))
+
+
 class ModelSerializer(metaclass=ABCMeta):
-    def __init__(self):
-        pass
+    def __init__(self, profiler=None, copy_containers=True):
+        self.profiler = profiler
+        self.copy_containers = copy_containers
+        self._conversion_cache = {}
+        self._pass_through_cache = {}
+        self._by_reference_cache = {}
+
+    @property
+    def cache_key(self):
+        return type(self), self.copy_containers
 
     def _iter_model_fields(self, model_class, **kwargs):
         return iter_model_fields(model_class, **kwargs)
 
+    def _converts_type(self, value_type):
+        # Whether serialize_value and deserialize_value convert values of value_type. Values of the leaf types in
+        # _LEAF_TYPES are assumed to be returned unchanged, so containers of them are copied in one go without
+        # calling serialize_value or deserialize_value for every item. Subclasses converting values of those types
+        # must return True for them.
+        return isinstance(value_type, ModelType)
+
+    def needs_conversion(self, value_type):
+        try:
+            return self._conversion_cache[value_type]
+        except KeyError:
+            pass
+
+        if value_type is None:
+            result = False
+        elif self._converts_type(value_type):
+            result = True
+        elif isinstance(value_type, (ListType, SetType)):
+            result = self.needs_conversion(value_type.item_type)
+        elif isinstance(value_type, DictType):
+            result = self.needs_conversion(value_type.key_type) or self.needs_conversion(value_type.value_type)
+        else:
+            result = type(value_type) not in _LEAF_TYPES
+
+        self._conversion_cache[value_type] = result
+        return result
+
+    def _pass_through(self, value_type, by_reference=False):
+        # Function returning values of value_type unchanged (or copied), None if they need conversion. Only
+        # containers of leaf values are copied in one go, nested containers are copied level by level.
+        by_reference = by_reference or not self.copy_containers
+        cache = self._by_reference_cache if by_reference else self._pass_through_cache
+        try:
+            return cache[value_type]
+        except KeyError:
+            pass
+
+        if self.needs_conversion(value_type):
+            result = None
+        elif isinstance(value_type, ListType):
+            result = _as_list if by_reference else (None if _is_container(value_type.item_type) else list)
+        elif isinstance(value_type, SetType):
+            result = _as_set if by_reference else (None if _is_container(value_type.item_type) else set)
+        elif isinstance(value_type, DictType):
+            nested = _is_container(value_type.key_type) or _is_container(value_type.value_type)
+            result = _as_dict if by_reference else (None if nested else dict)
+        else:
+            result = _identity
+
+        cache[value_type] = result
+        return result
+
+    def prepare(self, *model_types):
+        # Computes conversion plans of all types used by model_types and the models they contain, and resolves
+        # model types referenced by name, so that the first (de)serialization in a new process does not pay for it
+        seen = set()
+        pending = list(model_types)
+        while pending:
+            model_type = pending.pop()
+            if model_type in seen:
+                continue
+            seen.add(model_type)
+            if hasattr(model_type, 'types_to_model_classes'):
+                pending.extend(model_type.types_to_model_classes.values())
+                continue
+            for field in model_type.fields.values():
+                value_types = [field.type]
+                while value_types:
+                    value_type = value_types.pop()
+                    if value_type is None:
+                        continue
+                    self._pass_through(value_type)
+                    if isinstance(value_type, ModelType):
+                        pending.append(value_type.native_type)
+                    elif isinstance(value_type, (ListType, SetType)):
+                        value_types.append(value_type.item_type)
+                    elif isinstance(value_type, DictType):
+                        value_types.extend((value_type.key_type, value_type.value_type))
+        return self
+
     @abstractmethod
     def _serialize_model(self, value, model_type, **kwargs):
         raise NotImplementedError()  # pragma: no cover
@@ -41,7 +259,7 @@ class ModelSerializer(metaclass=ABCMeta):
             raise TypeError('Value is not an instance of Model')
         if model_type is None:
             model_type = type(value)
-        return self._serialize_model(value, model_type)
+        return self._serialize_model(value, model_type, **kwargs)
 
     @abstractmethod
     def _deserialize_model(self, value, model_type, **kwargs):
@@ -49,7 +267,7 @@ class ModelSerializer(metaclass=ABCMeta):
 
     def deserialize_model(self, value, model_or_model_type, **kwargs):
         try:
-            return self._deserialize_model(value, model_or_model_type, **kwargs)
+            return self._deserialize_root(value, model_or_model_type, kwargs)
         except ModelValidationError:
             raise  # pragma: no cover
         except ValidationError as e:
@@ -58,51 +276,346 @@ class ModelSerializer(metaclass=ABCMeta):
             mve.add_error(e)
             raise mve
 
+    def _deserialize_root(self, value, model_or_model_type, kwargs):
+        return self._deserialize_model(value, model_or_model_type, **kwargs)
+
     def serialize_value(self, value, value_type, field=None, **kwargs):
         if isinstance(value_type, ModelType):
             return self._serialize_model(value, value_type.native_type, **kwargs)
-        elif isinstance(value_type, ListType) and value is not None:
-            return [self.serialize_value(x, value_type.item_type) for x in value]
-        elif isinstance(value_type, SetType) and value is not None:
-            return set([self.serialize_value(x, value_type.item_type) for x in value])
-        elif isinstance(value_type, DictType) and value is not None:
-            return {self.serialize_value(k, value_type.key_type): self.serialize_value(v, value_type.value_type)
+        elif value is None:
+            return None
+
+        pass_through = self._pass_through(value_type)
+        if pass_through is not None:
+            return pass_through(value)
+
+        item_kwargs = _item_kwargs(kwargs)
+        if isinstance(value_type, ListType):
+            return [self.serialize_value(x, value_type.item_type, **item_kwargs) for x in value]
+        elif isinstance(value_type, SetType):
+            return set([self.serialize_value(x, value_type.item_type, **item_kwargs) for x in value])
+        elif isinstance(value_type, DictType):
+            return {self.serialize_value(k, value_type.key_type, **item_kwargs):
+                    self.serialize_value(v, value_type.value_type, **item_kwargs)
                     for k, v in value.items()}
         return value
 
     def deserialize_value(self, value, value_type, field=None, **kwargs):
+        if kwargs.get('validate'):
+            return self._deserialize_validated(value, value_type, field, kwargs)
+
         if isinstance(value_type, ModelType):
             return self._deserialize_model(value, value_type.native_type, **kwargs)
-        elif isinstance(value_type, ListType) and value is not None:
-            return [self.deserialize_value(x, value_type.item_type) for x in value]
-        elif isinstance(value_type, SetType) and value is not None:
-            return set([self.deserialize_value(x, value_type.item_type) for x in value])
-        elif isinstance(value_type, DictType) and value is not None:
-            return {self.deserialize_value(k, value_type.key_type): self.deserialize_value(v, value_type.value_type)
+        elif value is None:
+            return None
+
+        pass_through = self._pass_through(value_type, kwargs.get('trusted', False))
+        if pass_through is not None:
+            return pass_through(value)
+
+        item_kwargs = _item_kwargs(kwargs)
+        if isinstance(value_type, ListType):
+            return [self.deserialize_value(x, value_type.item_type, **item_kwargs) for x in value]
+        elif isinstance(value_type, SetType):
+            return set([self.deserialize_value(x, value_type.item_type, **item_kwargs) for x in value])
+        elif isinstance(value_type, DictType):
+            return {self.deserialize_value(k, value_type.key_type, **item_kwargs):
+                    self.deserialize_value(v, value_type.value_type, **item_kwargs)
                     for k, v in value.items()}
         return value
 
+    def _deserialize_validated(self, value, value_type, field, kwargs):
+        # Deserializes value and validates it like value_type.validate would. None values of fields are
+        # left to the caller, which checks whether the field is required.
+        if value_type is None:
+            return value
+        if value is None:
+            if field is None:
+                value_type.validate(value)
+            return None
+
+        if isinstance(value_type, ModelType):
+            result = self._deserialize_model(value, value_type.native_type, **kwargs)
+            value_type.validate_shallow(result)
+            return result
+
+        if not self.needs_conversion(value_type) or not isinstance(value_type, (ListType, SetType, DictType)):
+            result = self.deserialize_value(value, value_type, field=field)
+            value_type.validate(result)
+            return result
+
+        item_kwargs = _item_kwargs(kwargs)
+        error = ModelValidationError()
+        if isinstance(value_type, DictType):
+            if not isinstance(value, Mapping):
+                value_type.validate_shallow(value)
+            result = {}
+            for item_key, item_value in value.items():
+                sub_error = ModelValidationError()
+                try:
+                    item_key = self.deserialize_value(item_key, value_type.key_type, **item_kwargs)
+                except ValidationError as e:
+                    sub_error.add_sub_error('key', e)
+                try:
+                    item_value = self.deserialize_value(item_value, value_type.value_type, **item_kwargs)
+                except ValidationError as e:
+                    sub_error.add_sub_error('value', e)
+                if sub_error:
+                    error.add_sub_error(item_key, sub_error)
+                else:
+                    result[item_key] = item_value
+        else:
+            if not isinstance(value, (list, tuple, set, frozenset)):
+                value_type.validate_shallow(value)
+            is_set = isinstance(value_type, SetType)
+            items = []
+            for key, item in enumerate(value):
+                try:
+                    items.append(self.deserialize_value(item, value_type.item_type, **item_kwargs))
+                except ValidationError as e:
+                    error.add_sub_error(item if is_set else key, e)
+            result = set(items) if is_set else items
+
+        value_type.validate_shallow(result)
+        if error:
+            raise error
+        return result
+
+
+class _ModelFrame:
+    # Model being deserialized by DictModelSerializer._deserialize_iterative
+    __slots__ = ('model_class', 'model', 'values', 'error', 'owner', 'owner_field', 'target', 'key')
+
+    def __init__(self, model_class, model, owner, owner_field, target, key):
+        self.model_class = model_class
+        self.model = model
+        self.values = {}
+        self.error = ModelValidationError()
+        self.owner = owner
+        self.owner_field = owner_field
+        self.target = target
+        self.key = key
+
+    def fail(self, name, error):
+        # The first error of a field wins, like when deserialization of the field stops at it
+        if name not in self.error.sub_errors:
+            self.error.add_sub_error(name, error)
+
+
+def _contains_models(value_type):
+    return value_type is not None and value_type.contains_models
+
+
+def _create_model(model_class, values, trusted):
+    # Frozen models cannot be assigned to once created and trusted values need no __init__, both are
+    # constructed. Other models are created and assigned to like before, which keeps models with their own
+    # __init__ without field arguments working.
+    if trusted or model_class.frozen:
+        return model_class.construct(**values)
+    model = model_class()
+    for name, value in values.items():
+        setattr(model, name, value)
+    return model
+
+
+class InternTable:
+    # Bounded LRU table returning one shared instance for equal frozen models. Like ValidationCache it can be
+    # shared between threads without a lock, its counters are approximate then.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._models = OrderedDict()
+
+    def intern(self, model):
+        try:
+            existing = self._models.setdefault(model, model)
+        except TypeError:
+            # Frozen models can still contain unhashable values of untyped fields
+            return model
+        if existing is not model:
+            try:
+                self._models.move_to_end(existing)
+            except KeyError:
+                # Evicted by another thread in the meantime
+                pass
+            self.hits += 1
+            return existing
+        self.misses += 1
+        if len(self._models) > self.maxsize:
+            try:
+                self._models.popitem(last=False)
+            except KeyError:
+                pass
+        return model
+
+    def clear(self):
+        self._models.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._models), 'maxsize': self.maxsize}
+
+
+class Limits:
+    # Resource limits of deserialized payloads, checked before they are converted to models. max_bytes limits
+    # the length of serialized input (characters of str), max_depth the nesting of containers (the root mapping
+    # is level 1), max_items the length of each container and max_total_items the sum of their lengths.
+    def __init__(self, max_bytes=None, max_depth=None, max_items=None, max_total_items=None):
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_total_items = max_total_items
+
+    def check_size(self, size):
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise ValidationError('Payload is larger than {} bytes'.format(self.max_bytes))
+
+    def check(self, value):
+        max_depth = self.max_depth
+        max_items = self.max_items
+        max_total_items = self.max_total_items
+        if max_depth is None and max_items is None and max_total_items is None:
+            return
+
+        total_items = 0
+        # Explicit stack, payloads too deep for recursion are what max_depth protects from
+        stack = [(value, 1)]
+        while stack:
+            value, depth = stack.pop()
+            if isinstance(value, Mapping):
+                items = value.values()
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                items = value
+            else:
+                continue
+
+            if max_depth is not None and depth > max_depth:
+                raise ValidationError('Payload is nested deeper than {} levels'.format(max_depth))
+            size = len(items)
+            if max_items is not None and size > max_items:
+                raise ValidationError('Container of {} items exceeds the limit of {} items'.format(size, max_items))
+            total_items += size
+            if max_total_items is not None and total_items > max_total_items:
+                raise ValidationError('Payload has more than {} items'.format(max_total_items))
+            depth += 1
+            stack.extend((item, depth) for item in items)
+
+
+REFERENCE_ID_KEY = '$id'
+REFERENCE_KEY = '$ref'
+
+
+class _References:
+    # Per call state of (de)serialization with references=True
+    def __init__(self, shared=frozenset(), definitions=None):
+        self.shared = shared
+        self.ids = {}
+        self.objects = {}
+        self.definitions = definitions if definitions is not None else {}
+        self.pending = set()
+
+
+def _reference_definitions(value):
+    # Serialized models with a reference id by id. Collected before deserializing, so that references can be
+    # resolved wherever their model is in the input, e.g. after a key it was sorted behind.
+    result = {}
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Mapping):
+            reference_id = value.get(REFERENCE_ID_KEY)
+            if reference_id is not None:
+                try:
+                    definition = result.setdefault(reference_id, value)
+                except TypeError:
+                    raise ValidationError('Invalid model reference id {!r}'.format(reference_id))
+                if definition is not value:
+                    raise ValidationError('Duplicate model reference id {!r}'.format(reference_id))
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return result
+
+
+def _shared_models(model):
+    # Identities of models referenced more than once in the tree of model, cycles included
+    counts = {id(model): 1}
+    stack = [model]
+    while stack:
+        value = stack.pop()
+        for name, field in value.fields.items():
+            for nested in field.type.iter_models(getattr(value, name)):
+                key = id(nested)
+                if key in counts:
+                    counts[key] += 1
+                else:
+                    counts[key] = 1
+                    stack.append(nested)
+    return frozenset(key for key, count in counts.items() if count > 1)
+
 
 class DictModelSerializer(ModelSerializer):
-    def __init__(self, mapping_type=dict):
-        super().__init__()
+    def __init__(self, mapping_type=dict, iterative=False, intern_size=None, limits=None, share_cached=False,
+                 **kwargs):
+        super().__init__(**kwargs)
         self.mapping_type = mapping_type
+        self.iterative = iterative
+        self.intern_table = InternTable(intern_size) if intern_size else None
+        self.limits = limits
+        self.share_cached = share_cached
+
+    @property
+    def cache_key(self):
+        return super().cache_key + (self.mapping_type,)
+
+    @property
+    def _caches_mappings(self):
+        # Cached dicts are returned as they are, so callers could modify the cache through them
+        return self.share_cached
 
     def _serialize_model(self, value, model_type, **kwargs):
         if value is None:
             return None
 
+        cache_key = None
+        if not kwargs and self._caches_mappings and caches_serialization(type(value)):
+            cache_key = (self.cache_key, model_type)
+            result = get_cached_serialization(value, cache_key)
+            if result is not None:
+                return result
+
         model_class = type(value)
 
         result = self.mapping_type()
-        for name, field in self._iter_model_fields(model_class, **kwargs):
-            result[name] = self.serialize_value(getattr(value, name), field.type, field=field, **kwargs)
+        references = kwargs.get('references')
+        if references is not None and id(value) in references.shared:
+            reference_id = references.ids.get(id(value))
+            if reference_id is not None:
+                result[REFERENCE_KEY] = reference_id
+                return result
+            reference_id = references.ids[id(value)] = len(references.ids) + 1
+            result[REFERENCE_ID_KEY] = reference_id
+
+        profiler = self.profiler
+        iter_fields = self._iter_model_fields(model_class, **kwargs)
+        for name, field, field_kwargs in _iter_field_kwargs(model_class, iter_fields, kwargs):
+            field_value = getattr(value, name)
+            if profiler is not None:
+                start = perf_counter()
+            result[name] = self.serialize_value(field_value, field.type, field=field, **field_kwargs)
+            if profiler is not None:
+                profiler.add('serialize', model_class, field, perf_counter() - start, field_value)
 
         type_specifier_name = get_type_specifier_name(model_type)
         if type_specifier_name:
             model_type_name = get_type_name_for_model(model_type, model_class)
             result[type_specifier_name] = model_type_name
 
+        if cache_key is not None:
+            set_cached_serialization(value, cache_key, result)
+
         return result
 
     def _deserialize_model(self, value, model_or_model_type, **kwargs):
@@ -112,6 +625,14 @@ class DictModelSerializer(ModelSerializer):
         if not isinstance(value, Mapping):
             raise ValidationError('Model deserialization requires mapping type')
 
+        references = kwargs.get('references')
+        if references is not None:
+            if REFERENCE_KEY in value:
+                return self._resolve_reference(value[REFERENCE_KEY], model_or_model_type, references, kwargs)
+            if value.get(REFERENCE_ID_KEY) in references.objects:
+                # Already created for a reference found before it
+                return self._resolve_reference(value[REFERENCE_ID_KEY], model_or_model_type, references, kwargs)
+
         if isinstance(model_or_model_type, Model):
             model = model_or_model_type
             model_class = type(model)
@@ -124,34 +645,447 @@ class DictModelSerializer(ModelSerializer):
                 type_name = value[type_specifier_name]
 
             model_class = get_model_class_for_type(model_or_model_type, type_name)
-            model = model_class()
+            model = None
 
+        reference_id = None
+        if references is not None:
+            reference_id = value.get(REFERENCE_ID_KEY)
+            if reference_id is not None and model is None and not model_class.frozen:
+                # Registered before the fields are deserialized, so that they can refer to it. Frozen models
+                # cannot be part of cycles and are registered once created.
+                model = model_class.construct() if kwargs.get('trusted') else model_class()
+            if reference_id is not None:
+                if model is not None:
+                    references.objects[reference_id] = model
+                else:
+                    references.pending.add(reference_id)
+
+        values = {}
         error = ModelValidationError()
-        for name, field in self._iter_model_fields(model_class, **kwargs):
+        profiler = self.profiler
+        validate = kwargs.get('validate', False)
+        iter_fields = self._iter_model_fields(model_class, **kwargs)
+        for name, field, field_kwargs in _iter_field_kwargs(model_class, iter_fields, kwargs):
+            field_value = value.get(name)
+            if profiler is not None:
+                start = perf_counter()
             try:
-                deserialized_value = self.deserialize_value(value.get(name), field.type, field=field, **kwargs)
+                values[name] = deserialized_value = self.deserialize_value(field_value, field.type, field=field,
+                                                                           **field_kwargs)
+                if validate and deserialized_value is None:
+                    field.validate(None)
             except ValidationError as field_error:
                 error.add_sub_error(name, field_error)
-            else:
-                setattr(model, name, deserialized_value)
+            if profiler is not None:
+                profiler.add('deserialize', model_class, field, perf_counter() - start, field_value)
 
         if error:
             raise error
 
+        if model is None:
+            model = _create_model(model_class, values, kwargs.get('trusted'))
+            if self.intern_table is not None and model_class.frozen:
+                model = self.intern_table.intern(model)
+            if reference_id is not None:
+                references.objects[reference_id] = model
+                references.pending.discard(reference_id)
+            return model
+
+        for name, deserialized_value in values.items():
+            setattr(model, name, deserialized_value)
+        return model
+
+    def _resolve_reference(self, reference_id, model_type, references, kwargs):
+        try:
+            model = references.objects.get(reference_id)
+            definition = references.definitions.get(reference_id)
+        except TypeError:
+            model = definition = None
+        if model is None:
+            # Models referring to themselves through frozen models are pending, those cannot be created
+            if definition is None or reference_id in references.pending:
+                raise ValidationError('Unknown model reference {!r}'.format(reference_id))
+            model = self._deserialize_model(definition, model_type, **kwargs)
+        if not isinstance(model_type, Model) and not isinstance(model, model_type):
+            raise ValidationError('Model reference {!r} is not {}'.format(reference_id, model_type.__qualname__))
         return model
 
+    # Explicit stack implementations used with iterative=True, for trees too deep for recursion. Only values
+    # containing models are deferred to the stack, other values are converted by serialize_value and
+    # deserialize_value. Field filters, validation while deserializing, references and profiling use the
+    # recursive implementations.
+
+    def serialize_model(self, value, model_type=None, **kwargs):
+        if 'references' in kwargs and not isinstance(kwargs['references'], _References):
+            if kwargs.pop('references'):
+                if not isinstance(value, Model):
+                    raise TypeError('Value is not an instance of Model')
+                kwargs['references'] = _References(_shared_models(value))
+        if not self.iterative or kwargs or self.profiler is not None:
+            return super().serialize_model(value, model_type, **kwargs)
+        if not isinstance(value, Model):
+            raise TypeError('Value is not an instance of Model')
+
+        stack = []
+        result = self._serialize_model_shell(value, model_type if model_type is not None else type(value), stack)
+        while stack:
+            item_value, value_type, target, key = stack.pop()
+            target[key] = self._serialize_shell(item_value, value_type, stack)
+        return result
+
+    def _serialize_model_shell(self, value, model_type, stack):
+        # Serializes fields of value without models, which are pushed to the stack to be filled in later
+        if value is None:
+            return None
+
+        cache_key = None
+        if self._caches_mappings and caches_serialization(type(value)):
+            cache_key = (self.cache_key, model_type)
+            result = get_cached_serialization(value, cache_key)
+            if result is not None:
+                return result
+
+        model_class = type(value)
+        result = self.mapping_type()
+        for name, field in model_class.fields.items():
+            field_value = getattr(value, name)
+            if field_value is not None and field.type.contains_models:
+                result[name] = None
+                stack.append((field_value, field.type, result, name))
+            else:
+                result[name] = self.serialize_value(field_value, field.type, field=field)
+
+        type_specifier_name = get_type_specifier_name(model_type)
+        if type_specifier_name:
+            result[type_specifier_name] = get_type_name_for_model(model_type, model_class)
+
+        if cache_key is not None:
+            # Cached before the nested models are filled in, which happens before the result is returned
+            set_cached_serialization(value, cache_key, result)
+        return result
+
+    def _serialize_shell(self, value, value_type, stack):
+        if value is None:
+            return None
+        if isinstance(value_type, ModelType):
+            return self._serialize_model_shell(value, value_type.native_type, stack)
+        if isinstance(value_type, ListType) and _contains_models(value_type.item_type):
+            result = [None] * len(value)
+            stack.extend((item, value_type.item_type, result, index) for index, item in enumerate(value))
+            return result
+        if isinstance(value_type, DictType) and _contains_models(value_type.value_type):
+            result = {}
+            for item_key, item_value in value.items():
+                item_key = self.serialize_value(item_key, value_type.key_type)
+                result[item_key] = None
+                stack.append((item_value, value_type.value_type, result, item_key))
+            return result
+        return self.serialize_value(value, value_type)
+
+    def _deserialize_root(self, value, model_or_model_type, kwargs):
+        if self.limits is not None:
+            self.limits.check(value)
+        if 'references' in kwargs and not isinstance(kwargs['references'], _References):
+            kwargs = dict(kwargs)
+            if kwargs.pop('references'):
+                kwargs['references'] = _References(definitions=_reference_definitions(value))
+        if not self.iterative or self.profiler is not None or any(key != 'trusted' for key in kwargs):
+            return super()._deserialize_root(value, model_or_model_type, kwargs)
+        return self._deserialize_iterative(value, model_or_model_type, kwargs)
+
+    def _deserialize_iterative(self, value, model_or_model_type, kwargs):
+        # Models are created when their frame is popped from the stack, after all values pushed above it
+        result = [None]
+        stack = []
+        self._enter_model(value, model_or_model_type, stack, kwargs, None, None, result, 0)
+        while stack:
+            task = stack.pop()
+            if isinstance(task, _ModelFrame):
+                self._exit_model(task, kwargs)
+                continue
+
+            item_value, value_type, target, key, frame, field_name = task
+            if field_name in frame.error.sub_errors:
+                continue
+            try:
+                target[key] = self._deserialize_shell(item_value, value_type, stack, kwargs, frame, field_name,
+                                                      target, key)
+            except ValidationError as e:
+                frame.fail(field_name, e)
+        return result[0]
+
+    def _enter_model(self, value, model_or_model_type, stack, kwargs, owner, owner_field, target, key):
+        if value is None:
+            return None
+
+        if not isinstance(value, Mapping):
+            raise ValidationError('Model deserialization requires mapping type')
+
+        if isinstance(model_or_model_type, Model):
+            model = model_or_model_type
+            model_class = type(model)
+        else:
+            type_name = None
+            type_specifier_name = get_type_specifier_name(model_or_model_type)
+            if type_specifier_name is not None:
+                if type_specifier_name not in value:
+                    raise ValidationError('Polymorphic model requires type specifier')
+                type_name = value[type_specifier_name]
+
+            model_class = get_model_class_for_type(model_or_model_type, type_name)
+            model = None
+
+        frame = _ModelFrame(model_class, model, owner, owner_field, target, key)
+        stack.append(frame)
+        values = frame.values
+        tasks = []
+        for name, field in model_class.fields.items():
+            field_value = value.get(name)
+            if field_value is not None and field.type.contains_models:
+                values[name] = None
+                tasks.append((field_value, field.type, values, name, frame, name))
+                continue
+            try:
+                values[name] = self.deserialize_value(field_value, field.type, field=field, **kwargs)
+            except ValidationError as field_error:
+                frame.fail(name, field_error)
+        stack.extend(reversed(tasks))
+        return None
+
+    def _exit_model(self, frame, kwargs):
+        # Tasks of failed fields are skipped, so frames are only entered (and exited) while their field is valid
+        if frame.error:
+            if frame.owner is None:
+                raise frame.error
+            frame.owner.fail(frame.owner_field, frame.error)
+            return
+
+        if frame.model is None:
+            model = _create_model(frame.model_class, frame.values, kwargs.get('trusted'))
+            if self.intern_table is not None and frame.model_class.frozen:
+                model = self.intern_table.intern(model)
+        else:
+            model = frame.model
+            for name, deserialized_value in frame.values.items():
+                setattr(model, name, deserialized_value)
+        frame.target[frame.key] = model
+
+    def _deserialize_shell(self, value, value_type, stack, kwargs, frame, field_name, target, key):
+        if value is None:
+            return None
+        if isinstance(value_type, ModelType):
+            # Stored to target[key] when the model is created
+            return self._enter_model(value, value_type.native_type, stack, kwargs, frame, field_name, target, key)
+        if isinstance(value_type, ListType) and _contains_models(value_type.item_type):
+            result = []
+            tasks = []
+            for index, item in enumerate(value):
+                result.append(None)
+                tasks.append((item, value_type.item_type, result, index, frame, field_name))
+            stack.extend(reversed(tasks))
+            return result
+        if isinstance(value_type, DictType) and _contains_models(value_type.value_type):
+            result = {}
+            tasks = []
+            for item_key, item_value in value.items():
+                item_key = self.deserialize_value(item_key, value_type.key_type, **kwargs)
+                result[item_key] = None
+                tasks.append((item_value, value_type.value_type, result, item_key, frame, field_name))
+            stack.extend(reversed(tasks))
+            return result
+        return self.deserialize_value(value, value_type, **kwargs)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SECOND = timedelta(seconds=1)
+_MILLISECOND = timedelta(milliseconds=1)
+_timezones = {}
+_MINUTE = timedelta(minutes=1)
+
+
+def _cached_timezone(value):
+    # Parsed values get a new tzinfo instance each, share one per offset instead. Only whole minute offsets
+    # are shared, which bounds the cache to less than 3000 entries whatever the input contains.
+    tzinfo = value.tzinfo
+    if tzinfo is None or tzinfo is timezone.utc:
+        return value
+    offset = tzinfo.utcoffset(None)
+    if offset % _MINUTE:
+        return value
+    cached = _timezones.get(offset)
+    if cached is None:
+        cached = _timezones[offset] = timezone(offset)
+    if cached is tzinfo:
+        return value
+    return value.replace(tzinfo=cached)
+
+
+def _decoder(parse):
+    def decode(value):
+        try:
+            return parse(value)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise ValidationError('{!r} is not a valid value: {}'.format(value, e))
+    return decode
+
+
+def _parse_iso_datetime(value):
+    if not isinstance(value, str):
+        raise TypeError('ISO 8601 value must be a string')
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return _cached_timezone(datetime.fromisoformat(value))
+
+
+def _to_epoch_delta(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value - _EPOCH
+
+
+def _parse_epoch(value):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError('epoch timestamp must be an integer')
+    return _EPOCH + timedelta(seconds=value)
+
+
+def _parse_epoch_ms(value):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError('epoch timestamp must be an integer')
+    return _EPOCH + timedelta(milliseconds=value)
+
+
+DATETIME_CODECS = {
+    'iso': (datetime.isoformat, _decoder(_parse_iso_datetime)),
+    'epoch': (lambda value: _to_epoch_delta(value) // _SECOND, _decoder(_parse_epoch)),
+    'epoch_ms': (lambda value: _to_epoch_delta(value) // _MILLISECOND, _decoder(_parse_epoch_ms)),
+}
+# Epoch timestamps decoded to naive datetimes in UTC, see JsonModelSerializer naive_datetimes
+NAIVE_DATETIME_CODECS = {
+    'epoch': (DATETIME_CODECS['epoch'][0], _decoder(lambda value: _parse_epoch(value).replace(tzinfo=None))),
+    'epoch_ms': (DATETIME_CODECS['epoch_ms'][0], _decoder(lambda value: _parse_epoch_ms(value).replace(tzinfo=None))),
+}
+DATE_CODEC = (date.isoformat, _decoder(date.fromisoformat))
+TIME_CODEC = (time.isoformat, _decoder(lambda value: _cached_timezone(time.fromisoformat(value))))
+
+
+def _json_input(value, limits=None):
+    # json.loads decodes bytes and bytearray itself, memoryviews are decoded without copying them to bytes first
+    if isinstance(value, (str, bytes, bytearray)):
+        if limits is not None:
+            limits.check_size(len(value))
+        return value
+    if isinstance(value, memoryview):
+        if limits is not None:
+            limits.check_size(value.nbytes)
+        return str(value, 'utf-8')
+    read = getattr(value, 'read', None)
+    if read is not None:
+        if limits is None or limits.max_bytes is None:
+            return read()
+        # Reads at most one byte over the limit instead of the whole file
+        data = read(limits.max_bytes + 1)
+        limits.check_size(len(data))
+        return data
+    raise TypeError('JSON input must be str, bytes, bytearray, memoryview or a file object, not {}'
+                    .format(type(value).__qualname__))
+
 
 class JsonModelSerializer(DictModelSerializer):
-    def __init__(self, sort_keys=False):
-        super().__init__()
+    def __init__(self, sort_keys=False, datetime_format='iso', naive_datetimes=False, **kwargs):
+        super().__init__(**kwargs)
+        if datetime_format not in DATETIME_CODECS:
+            raise ValueError('Unknown datetime format {!r}'.format(datetime_format))
+        if naive_datetimes and datetime_format not in NAIVE_DATETIME_CODECS:
+            raise ValueError('naive_datetimes requires an epoch datetime format')
         self.sort_keys = sort_keys
+        self.datetime_format = datetime_format
+        self.naive_datetimes = naive_datetimes
+        self._codecs = {
+            DateTimeType: (NAIVE_DATETIME_CODECS if naive_datetimes else DATETIME_CODECS)[datetime_format],
+            DateType: DATE_CODEC,
+            TimeType: TIME_CODEC,
+        }
+        self._codec_cache = {}
+
+    @property
+    def cache_key(self):
+        return super().cache_key + (self.sort_keys, self.datetime_format, self.naive_datetimes)
+
+    @property
+    def _caches_mappings(self):
+        # The dicts are only passed to json.dumps, nested models reuse them when a containing model changed
+        return True
+
+    def _codec(self, value_type):
+        try:
+            return self._codec_cache[value_type]
+        except KeyError:
+            pass
+
+        result = None
+        for type_class in type(value_type).__mro__:
+            if type_class in self._codecs:
+                result = self._codecs[type_class]
+                break
+
+        self._codec_cache[value_type] = result
+        return result
+
+    def _converts_type(self, value_type):
+        return self._codec(value_type) is not None or super()._converts_type(value_type)
+
+    def serialize_value(self, value, value_type, field=None, **kwargs):
+        codec = self._codec(value_type)
+        if codec is not None:
+            return None if value is None else codec[0](value)
+        if isinstance(value_type, ListType) and value is not None:
+            codec = self._codec(value_type.item_type)
+            if codec is not None:
+                encode = codec[0]
+                return [None if x is None else encode(x) for x in value]
+        return super().serialize_value(value, value_type, field=field, **kwargs)
+
+    def deserialize_value(self, value, value_type, field=None, **kwargs):
+        if kwargs.get('validate'):
+            return super().deserialize_value(value, value_type, field=field, **kwargs)
+
+        codec = self._codec(value_type)
+        if codec is not None:
+            return None if value is None else codec[1](value)
+        if isinstance(value_type, ListType) and value is not None:
+            codec = self._codec(value_type.item_type)
+            if codec is not None:
+                decode = codec[1]
+                return [None if x is None else decode(x) for x in value]
+        return super().deserialize_value(value, value_type, field=field, **kwargs)
 
     def serialize_model(self, value, model_type=None, **kwargs):
-        return json.dumps(super().serialize_model(value, model_type, **kwargs), sort_keys=self.sort_keys)
+        if not isinstance(value, Model) or kwargs or not caches_serialization(type(value)):
+            return self._dumps(super().serialize_model(value, model_type, **kwargs))
 
-    def _deserialize_model(self, value, model_or_model_type, **kwargs):
+        cache_key = ('json', self.cache_key, model_type if model_type is not None else type(value))
+        result = get_cached_serialization(value, cache_key)
+        if result is None:
+            result = self._dumps(super().serialize_model(value, model_type))
+            set_cached_serialization(value, cache_key, result)
+        return result
+
+    def _dumps(self, value):
+        # json recurses into nested values even when the dicts were built with iterative=True
+        try:
+            return json.dumps(value, sort_keys=self.sort_keys)
+        except RecursionError:
+            raise ValueError('Value is nested too deeply to be encoded as JSON')
+
+    def _deserialize_root(self, value, model_or_model_type, kwargs):
+        # Parsed here, so that parse errors are reported as ModelValidationError like other errors
         try:
-            value = json.loads(value)
+            value = json.loads(_json_input(value, self.limits))
+        except ValidationError:
+            raise
         except ValueError as e:
             raise ValidationError('Value is not a valid JSON: ' + str(e))
-        return super()._deserialize_model(value, model_or_model_type, **kwargs)
\ No newline at end of file
+        except RecursionError:
+            raise ValidationError('Value is nested too deeply to be parsed')
+        return super()._deserialize_root(value, model_or_model_type, kwargs)
\ No newline at end of file
@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from collections.abc import Iterable
-from datetime import datetime, date, time
-from importlib import import_module
-from urllib.parse import urlparse
-import re
+from itertools import chain
 import builtins
+import math
 from .exceptions import ValidationError, ModelValidationError
+from .lazy import lazy_import
+from .model import Model
+
+datetime = lazy_import('datetime')
+importlib = lazy_import('importlib')
+random = lazy_import('random')
+re = lazy_import('re')
+urllib_parse = lazy_import('urllib.parse')
 
 
 class ValueType:
@@ -21,6 +28,28 @@ class ValueType:
         for validator in self.validators:
             validator(value)
 
+    def validate_shallow(self, value):
+        # Validates value without items and nested models, which are validated by the caller
+        self.validate(value)
+
+    def freeze(self, value):
+        return value
+
+    @property
+    def contains_models(self):
+        return False
+
+    def iter_models(self, value):
+        return iter(())
+
+    def iter_model_types(self):
+        # Model types of values this type can contain
+        return iter(())
+
+    def iter_items(self, value):
+        # Items of container values to validate as (error path, item, item type) tuples
+        return iter(())
+
     @property
     def native_type(self):
         return object
@@ -69,8 +98,45 @@ class ComparableType(ValueType):
             raise ValidationError('{!r} is too small, minimal allowed value is {!r}'.format(value, self.max_value))
 
 
+class ValidationCache:
+    # Types are shared between threads, e.g. validating in executors. Every operation on the OrderedDict is a
+    # single atomic call, so the cache needs no lock: values evicted by another thread are just misses. The hit
+    # and miss counters are not synchronized and can be slightly off under concurrent use.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def check(self, value):
+        try:
+            self._values.move_to_end(value)
+        except KeyError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, value):
+        self._values[value] = None
+        if len(self._values) > self.maxsize:
+            try:
+                self._values.popitem(last=False)
+            except KeyError:
+                # Emptied by other threads in the meantime
+                pass
+
+    def clear(self):
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values), 'maxsize': self.maxsize}
+
+
 class StringType(SizedType):
-    def __init__(self, regex=None, **kwargs):
+    def __init__(self, regex=None, cache_size=None, **kwargs):
         super().__init__(**kwargs)
         if regex is None:
             self.regex = None
@@ -78,6 +144,7 @@ class StringType(SizedType):
             self.regex = re.compile(regex)
         else:
             self.regex = regex
+        self.validation_cache = ValidationCache(cache_size) if cache_size else None
 
     @property
     def native_type(self):
@@ -85,8 +152,16 @@ class StringType(SizedType):
 
     def validate(self, value):
         super().validate(value)
+        cache = self.validation_cache
+        if cache is None:
+            self._validate_string(value)
+        elif not cache.check(value):
+            self._validate_string(value)
+            cache.add(value)
+
+    def _validate_string(self, value):
         if self.regex is not None and not self.regex.search(value):
-            raise ValidationError('{!r} does not match validation pattern')
+            raise ValidationError('{!r} does not match validation pattern'.format(value))
 
 
 class UrlType(StringType):
@@ -101,9 +176,9 @@ class UrlType(StringType):
         else:
             raise TypeError('Invalid value type {} for scheme constraint'.format(type(scheme)))
 
-    def validate(self, value):
-        super().validate(value)
-        parsed = urlparse(value)
+    def _validate_string(self, value):
+        super()._validate_string(value)
+        parsed = urllib_parse.urlparse(value)
         if self.scheme is not None and parsed.scheme not in self.scheme:
             raise ValidationError('{!r} scheme is not {!r}'.format(value, self.scheme))
 
@@ -114,16 +189,144 @@ class IntType(ComparableType):
         return int
 
 
+def _freeze_item(value_type, value):
+    if value is None or value_type is None:
+        return value
+    return value_type.freeze(value)
+
+
+def _iter_item_models(value_type, items):
+    for item in items:
+        if item is not None:
+            yield from value_type.iter_models(item)
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError('{} is immutable'.format(type(self).__qualname__))
+
+
+class FrozenList(list):
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+class FrozenSet(set):
+    __ior__ = __iand__ = __isub__ = __ixor__ = _immutable
+    add = discard = remove = pop = clear = update = _immutable
+    difference_update = intersection_update = symmetric_difference_update = _immutable
+
+    def __hash__(self):
+        return hash(frozenset(self))
+
+    def __reduce__(self):
+        return type(self), (set(self),)
+
+
+class FrozenDict(dict):
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class Sampler:
+    # Picks the items validated by container types created with sample, which is either the rate of items
+    # (a float) or their number (an int). Picks are reproducible for the same seed and sequence of validations.
+    def __init__(self, sample, seed=None):
+        if isinstance(sample, float):
+            if not 0.0 < sample <= 1.0:
+                raise ValueError('Sample rate must be in range (0, 1], got {!r}'.format(sample))
+        elif not isinstance(sample, int) or isinstance(sample, bool) or sample < 1:
+            raise ValueError('Sample must be a rate or a positive number of items, got {!r}'.format(sample))
+        self.sample = sample
+        self.seed = seed
+        self.validations = 0
+        self.items = 0
+        self.sampled = 0
+        self._random = None
+
+    def indices(self, size):
+        if isinstance(self.sample, float):
+            count = min(size, math.ceil(size * self.sample))
+        else:
+            count = min(size, self.sample)
+        self.validations += 1
+        self.items += size
+        self.sampled += count
+        if count == size:
+            return range(size)
+        if self._random is None:
+            self._random = random.Random(self.seed)
+        return sorted(self._random.sample(range(size), count))
+
+    def pick(self, items):
+        # Items of a sequence in their order
+        return [items[index] for index in self.indices(len(items))]
+
+    def clear(self):
+        self.validations = 0
+        self.items = 0
+        self.sampled = 0
+        self._random = None
+
+    def info(self):
+        return {'validations': self.validations, 'items': self.items, 'sampled': self.sampled, 'sample': self.sample}
+
+
+def _sampler(sample, sample_seed):
+    return Sampler(sample, sample_seed) if sample is not None else None
+
+
 class IterableType(SizedType):
-    def __init__(self, item_type=None, **kwargs):
+    def __init__(self, item_type=None, sample=None, sample_seed=None, **kwargs):
         super().__init__(**kwargs)
         self.item_type = item_type
+        self.sampler = _sampler(sample, sample_seed)
+
+    def _validated_items(self, value):
+        # (index, item) pairs of all items, or of items picked by the sampler
+        if self.sampler is None:
+            return enumerate(value)
+        return ((index, value[index]) for index in self.sampler.indices(len(value)))
+
+    def freeze(self, value):
+        if not isinstance(value, self.native_type) or isinstance(value, FrozenList):
+            return value
+        return FrozenList([_freeze_item(self.item_type, item) for item in value])
+
+    @property
+    def contains_models(self):
+        return self.item_type is not None and self.item_type.contains_models
+
+    def iter_models(self, value):
+        if not self.contains_models or not isinstance(value, self.native_type):
+            return iter(())
+        return _iter_item_models(self.item_type, value)
+
+    def iter_model_types(self):
+        return self.item_type.iter_model_types() if self.item_type is not None else iter(())
+
+    def iter_items(self, value):
+        return (((key,), item, self.item_type) for key, item in self._validated_items(value))
+
+    def validate_shallow(self, value):
+        super().validate(value)
 
     def validate(self, value):
         super().validate(value)
         if self.item_type is not None:
             error = ModelValidationError()
-            for key, item in enumerate(value):
+            for key, item in self._validated_items(value):
                 try:
                     self.item_type.validate(item)
                 except ValidationError as e:
@@ -139,19 +342,48 @@ class ListType(IterableType):
 
 
 class SetType(SizedType):
-    def __init__(self, item_type=None, **kwargs):
+    def __init__(self, item_type=None, sample=None, sample_seed=None, **kwargs):
         super().__init__(**kwargs)
         self.item_type = item_type
+        self.sampler = _sampler(sample, sample_seed)
+
+    def _validated_items(self, value):
+        if self.sampler is None:
+            return value
+        return self.sampler.pick(list(value))
 
     @property
     def native_type(self):
         return set
 
+    def freeze(self, value):
+        if not isinstance(value, self.native_type) or isinstance(value, FrozenSet):
+            return value
+        return FrozenSet([_freeze_item(self.item_type, item) for item in value])
+
+    @property
+    def contains_models(self):
+        return self.item_type is not None and self.item_type.contains_models
+
+    def iter_models(self, value):
+        if not self.contains_models or not isinstance(value, self.native_type):
+            return iter(())
+        return _iter_item_models(self.item_type, value)
+
+    def iter_model_types(self):
+        return self.item_type.iter_model_types() if self.item_type is not None else iter(())
+
+    def iter_items(self, value):
+        return (((item,), item, self.item_type) for item in self._validated_items(value))
+
+    def validate_shallow(self, value):
+        super().validate(value)
+
     def validate(self, value):
         super().validate(value)
         if self.item_type is not None:
             error = ModelValidationError()
-            for item_key in value:
+            for item_key in self._validated_items(value):
                 try:
                     self.item_type.validate(item_key)
                 except ValidationError as e:
@@ -161,20 +393,59 @@ class SetType(SizedType):
 
 
 class DictType(SizedType):
-    def __init__(self, key_type=None, value_type=None, **kwargs):
+    def __init__(self, key_type=None, value_type=None, sample=None, sample_seed=None, **kwargs):
         super().__init__(**kwargs)
         self.key_type = key_type
         self.value_type = value_type
+        self.sampler = _sampler(sample, sample_seed)
+
+    def _validated_items(self, value):
+        if self.sampler is None:
+            return value.items()
+        return self.sampler.pick(list(value.items()))
 
     @property
     def native_type(self):
         return dict
 
+    def freeze(self, value):
+        if not isinstance(value, self.native_type) or isinstance(value, FrozenDict):
+            return value
+        return FrozenDict((_freeze_item(self.key_type, item_key), _freeze_item(self.value_type, item_value))
+                          for item_key, item_value in value.items())
+
+    @property
+    def contains_models(self):
+        return ((self.key_type is not None and self.key_type.contains_models) or
+                (self.value_type is not None and self.value_type.contains_models))
+
+    def iter_models(self, value):
+        if not self.contains_models or not isinstance(value, self.native_type):
+            return iter(())
+        if self.key_type is None or not self.key_type.contains_models:
+            return _iter_item_models(self.value_type, value.values())
+        if self.value_type is None or not self.value_type.contains_models:
+            return _iter_item_models(self.key_type, value.keys())
+        return chain(_iter_item_models(self.key_type, value.keys()),
+                     _iter_item_models(self.value_type, value.values()))
+
+    def iter_model_types(self):
+        return chain.from_iterable(item_type.iter_model_types() for item_type in (self.key_type, self.value_type)
+                                   if item_type is not None)
+
+    def iter_items(self, value):
+        for item_key, item_value in self._validated_items(value):
+            yield (item_key, 'key'), item_key, self.key_type
+            yield (item_key, 'value'), item_value, self.value_type
+
+    def validate_shallow(self, value):
+        super().validate(value)
+
     def validate(self, value):
         super().validate(value)
         if self.key_type is not None or self.value_type is not None:
             error = ModelValidationError()
-            for item_key, item_value in value.items():
+            for item_key, item_value in self._validated_items(value):
                 sub_error = ModelValidationError()
 
                 if self.key_type is not None:
@@ -195,7 +466,20 @@ class DictType(SizedType):
                 raise error
 
 
+_imported_objects = {}
+
+
 def import_object(fully_qualified_name):
+    # Many model types usually refer to the same names, failed imports of their prefixes are expensive
+    try:
+        return _imported_objects[fully_qualified_name]
+    except KeyError:
+        pass
+    value = _imported_objects[fully_qualified_name] = _import_object(fully_qualified_name)
+    return value
+
+
+def _import_object(fully_qualified_name):
     parts = [part for part in fully_qualified_name.split('.') if part]
 
     module = None
@@ -203,7 +487,7 @@ def import_object(fully_qualified_name):
     part_count = len(parts)
     while module_parts < part_count:
         try:
-            part_module = import_module('.'.join(parts[:module_parts+1]))
+            part_module = importlib.import_module('.'.join(parts[:module_parts+1]))
         except ImportError:
             break
         module_parts += 1
@@ -234,6 +518,25 @@ class ModelType(ValueType):
     def native_type(self):
         return self.model_class
 
+    def freeze(self, value):
+        if isinstance(value, Model) and not value.frozen:
+            raise TypeError('Frozen models cannot contain mutable model {}'.format(type(value).__qualname__))
+        return value
+
+    @property
+    def contains_models(self):
+        return True
+
+    def iter_models(self, value):
+        if isinstance(value, Model):
+            yield value
+
+    def iter_model_types(self):
+        return iter((self.native_type,))
+
+    def validate_shallow(self, value):
+        super().validate(value)
+
     def validate(self, value):
         super().validate(value)
         if value is not None:
@@ -243,28 +546,28 @@ class ModelType(ValueType):
 class DateTimeType(ComparableType):
     @property
     def native_type(self):
-        return datetime
+        return datetime.datetime
 
     @property
     def default_value(self):
-        return datetime.now()
+        return datetime.datetime.now()
 
 
 class DateType(ComparableType):
     @property
     def native_type(self):
-        return date
+        return datetime.date
 
     @property
     def default_value(self):
-        return date.today()
+        return datetime.date.today()
 
 
 class TimeType(ComparableType):
     @property
     def native_type(self):
-        return time
+        return datetime.time
 
     @property
     def default_value(self):
-        return datetime.now().time()
\ No newline at end of file
+        return datetime.datetime.now().time()
\ No newline at end of file
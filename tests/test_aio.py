@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, AsyncMock
+from justamodel.aio import AsyncModelSerializer
+from justamodel.exceptions import ValidationError
+from justamodel.model import Model, Field
+from justamodel.serializer import JsonModelSerializer
+from justamodel.types import StringType, IntType
+
+
+class Item(Model):
+    name = Field(StringType())
+    count = Field(IntType())
+
+
+class TestAsyncModelSerializer(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.serializer = AsyncModelSerializer(JsonModelSerializer(sort_keys=True), inline_limit=10)
+        self.item = Item(name='a', count=1)
+        self.data = '{"count": 1, "name": "a"}'
+
+    async def test_serialize(self):
+        self.assertEqual(self.data, await self.serializer.serialize_model(self.item))
+
+    async def test_deserialize(self):
+        self.assertEqual(self.item, await self.serializer.deserialize_model(self.data, Item))
+        self.assertEqual(self.item, await self.serializer.deserialize_model(self.data.encode('utf-8'), Item))
+
+    async def test_deserialize_inline(self):
+        self.assertEqual(Item(name=None, count=None), await self.serializer.deserialize_model('{}', Item))
+
+    async def test_deserialize_invalid(self):
+        with self.assertRaises(ValidationError):
+            await self.serializer.deserialize_model('{"invalid json', Item)
+
+    async def test_validate(self):
+        await self.serializer.validate(self.item)
+        with self.assertRaises(ValidationError):
+            await self.serializer.validate(Item(name=None))
+
+    async def test_read_model(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(self.data.encode('utf-8'))
+        reader.feed_eof()
+        self.assertEqual(self.item, await self.serializer.read_model(reader, Item))
+
+    async def test_read_model_length(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(self.data.encode('utf-8') + b'trailing')
+        self.assertEqual(self.item, await self.serializer.read_model(reader, Item, length=len(self.data)))
+
+    async def test_write_model(self):
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+        self.assertEqual(len(self.data), await self.serializer.write_model(writer, self.item))
+        writer.write.assert_called_once_with(self.data.encode('utf-8'))
+        writer.drain.assert_awaited_once()
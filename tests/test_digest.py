@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+from justamodel import digest as digest_module
+from justamodel.digest import digest, hexdigest
+from justamodel.model import Model, Field, FrozenModel, CachedModel
+from justamodel.types import StringType, IntType, ListType, SetType, DictType, ModelType, DateType
+
+
+class Item(Model):
+    name = Field(StringType())
+    count = Field(IntType(), required=False)
+
+
+class OtherItem(Model):
+    name = Field(StringType())
+    count = Field(IntType(), required=False)
+
+
+class Document(Model):
+    items = Field(ListType(ModelType(Item)))
+    tags = Field(SetType(StringType()))
+    attributes = Field(DictType(StringType(), IntType()))
+    created = Field(DateType(), required=False)
+
+
+class FrozenItem(FrozenModel):
+    name = Field(StringType())
+
+
+class CachedItem(CachedModel):
+    name = Field(StringType())
+
+
+class CachedDocument(CachedModel):
+    item = Field(ModelType(CachedItem))
+
+
+class CachedPlainDocument(CachedModel):
+    item = Field(ModelType(Item))
+
+
+class TestDigest(TestCase):
+    def make_document(self, **kwargs):
+        values = dict(items=[Item(name='a', count=1), Item(name='b')], tags={'x', 'y', 'z'},
+                      attributes={'p': 1, 'q': 2}, created=date(2020, 1, 2))
+        values.update(kwargs)
+        return Document(**values)
+
+    def test_equal_models_have_equal_digests(self):
+        self.assertEqual(digest(self.make_document()), digest(self.make_document()))
+        self.assertEqual(32, len(digest(self.make_document())))
+        self.assertEqual(digest(self.make_document()).hex(), hexdigest(self.make_document()))
+
+    def test_canonical_order(self):
+        a = self.make_document(tags={'x', 'y', 'z'}, attributes={'p': 1, 'q': 2})
+        b = self.make_document(tags={'z', 'y', 'x'}, attributes={'q': 2, 'p': 1})
+        self.assertEqual(digest(a), digest(b))
+
+    def test_different_values(self):
+        reference = digest(self.make_document())
+        self.assertNotEqual(reference, digest(self.make_document(tags={'x', 'y'})))
+        self.assertNotEqual(reference, digest(self.make_document(attributes={'p': 1, 'q': 3})))
+        self.assertNotEqual(reference, digest(self.make_document(created=None)))
+        self.assertNotEqual(reference, digest(self.make_document(items=[Item(name='a', count=1)])))
+
+    def test_type_aware(self):
+        self.assertNotEqual(digest(Item(name='a', count=1)), digest(OtherItem(name='a', count=1)))
+        self.assertNotEqual(digest(Item(name='1', count=None)), digest(Item(name='', count=1)))
+
+    def test_algorithm(self):
+        self.assertEqual(20, len(digest(Item(name='a'), algorithm='sha1')))
+
+    def test_memoizes_frozen_models(self):
+        item = FrozenItem(name='a')
+        first = digest(item)
+        with patch.object(digest_module, '_update_value', side_effect=AssertionError):
+            self.assertEqual(first, digest(item))
+
+    def test_cached_models_invalidated(self):
+        item = CachedItem(name='a')
+        document = CachedDocument(item=item)
+        first = digest(document)
+        item.name = 'b'
+        self.assertNotEqual(first, digest(document))
+        self.assertEqual(digest(CachedDocument(item=CachedItem(name='b'))), digest(document))
+
+    def test_not_memoized_with_plain_models(self):
+        document = CachedPlainDocument(item=Item(name='a'))
+        first = digest(document)
+        document.item.name = 'b'
+        self.assertNotEqual(first, digest(document))
+
+    def test_invalid_value(self):
+        with self.assertRaises(TypeError):
+            digest(Item(name=object()))
+        with self.assertRaises(TypeError):
+            digest('not a model')
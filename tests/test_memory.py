@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import sys
+from unittest import TestCase
+from justamodel.memory import deep_sizeof, memory_usage
+from justamodel.model import Model, Field, CachedModel, set_cached_serialization
+from justamodel.types import StringType, IntType, ListType, DictType, ModelType
+
+
+class Item(Model):
+    name = Field(StringType())
+    count = Field(IntType(), required=False)
+
+
+class Document(Model):
+    title = Field(StringType())
+    items = Field(ListType(ModelType(Item)))
+    attributes = Field(DictType(StringType(), IntType()), required=False)
+
+
+class LazyDocument(Document):
+    lazy_defaults = True
+
+
+class CachedItem(CachedModel):
+    name = Field(StringType())
+
+
+def model_size(model):
+    return sys.getsizeof(model) + sys.getsizeof(model.__dict__)
+
+
+class TestDeepSizeof(TestCase):
+    def test_values(self):
+        self.assertEqual(0, deep_sizeof(None))
+        self.assertEqual(sys.getsizeof('abc'), deep_sizeof('abc'))
+        value = ['abc', 'defg', None]
+        self.assertEqual(sys.getsizeof(value) + sys.getsizeof('abc') + sys.getsizeof('defg'), deep_sizeof(value))
+        value = {'key': ['abc']}
+        self.assertEqual(sys.getsizeof(value) + sys.getsizeof('key') + sys.getsizeof(['abc']) + sys.getsizeof('abc'),
+                         deep_sizeof(value))
+
+    def test_model(self):
+        item = Item(name='item name', count=1000)
+        self.assertEqual(model_size(item) + sys.getsizeof('item name') + sys.getsizeof(1000), deep_sizeof(item))
+
+    def test_shared_values(self):
+        item = Item(name='item name', count=1000)
+        items = [item, item]
+        self.assertEqual(model_size(items[0]) + sys.getsizeof(items) + sys.getsizeof('item name') +
+                         sys.getsizeof(1000), deep_sizeof(items))
+
+        seen = set()
+        self.assertEqual(deep_sizeof(item), deep_sizeof(item, seen))
+        self.assertEqual(0, deep_sizeof(item, seen))
+
+    def test_cycles(self):
+        value = []
+        value.append(value)
+        self.assertEqual(sys.getsizeof(value), deep_sizeof(value))
+
+    def test_deep(self):
+        value = None
+        for _ in range(sys.getrecursionlimit() * 2):
+            value = [value]
+        self.assertEqual(sys.getrecursionlimit() * 2 * sys.getsizeof([None]), deep_sizeof(value))
+
+
+class TestMemoryUsage(TestCase):
+    def test_fields(self):
+        item = Item(name='item name', count=1000)
+        document = Document(title='title', items=[item], attributes={})
+        usage = memory_usage(document)
+        self.assertEqual(['title', 'items', 'attributes'], list(usage['fields']))
+        self.assertEqual(model_size(document), usage['instance'])
+        self.assertEqual(sys.getsizeof('title'), usage['fields']['title'])
+        self.assertEqual(sys.getsizeof([item]) + deep_sizeof(item), usage['fields']['items'])
+        self.assertEqual(sys.getsizeof({}), usage['fields']['attributes'])
+        self.assertEqual(deep_sizeof(document), usage['total'])
+
+    def test_shared_between_fields(self):
+        items = [Item(name='a')]
+        document = Document(title='title', items=items, attributes={'a': 1})
+        document.title = document.items[0].name
+        usage = memory_usage(document)
+        # Counted in the first field reaching it
+        self.assertEqual(sys.getsizeof('a'), usage['fields']['title'])
+        self.assertEqual(sys.getsizeof(items) + model_size(items[0]), usage['fields']['items'])
+        self.assertEqual(deep_sizeof(document), usage['total'])
+
+    def test_lazy_defaults(self):
+        document = LazyDocument(title='title')
+        usage = memory_usage(document)
+        self.assertEqual(0, usage['fields']['items'])
+        self.assertNotIn('items', document.__dict__)
+
+    def test_extra_attributes(self):
+        item = CachedItem(name='a')
+        size = memory_usage(item)['instance']
+        set_cached_serialization(item, 'key', 'serialized value')
+        usage = memory_usage(item)
+        self.assertGreater(usage['instance'], size + sys.getsizeof('serialized value'))
+        self.assertEqual(deep_sizeof(item), usage['total'])
+
+    def test_not_model(self):
+        with self.assertRaises(TypeError):
+            memory_usage({})
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import pickle
 from unittest import TestCase
 from unittest.mock import MagicMock
 from justamodel.exceptions import ValidationError, ModelValidationError
-from justamodel.model import Field, Model, PolymorphicModel, get_model_class_for_type, get_type_name_for_model, \
-    get_type_specifier_name
+from justamodel.model import Field, Model, FrozenModel, CachedModel, PolymorphicModel, get_model_class_for_type, \
+    get_type_name_for_model, get_type_specifier_name, get_cached_serialization, set_cached_serialization, ModelBatch, \
+    caches_serialization
+from justamodel.types import StringType, ListType, SetType, DictType, ModelType
 
 
 class TestField(TestCase):
@@ -85,6 +88,29 @@ class TestModelMeta(TestCase):
 
         self.assertEqual(InheritingModel.fields, {'field': overriden_field, 'another': another_field})
 
+    def test_merges_fields_in_mro_order(self):
+        base_field = Field(MagicMock())
+        overriden_field = Field(MagicMock())
+
+        class BaseModel(Model):
+            field = base_field
+            a = Field(MagicMock())
+
+        class Left(BaseModel):
+            b = Field(MagicMock())
+
+        class Right(BaseModel):
+            field = overriden_field
+
+        class Mixin:
+            pass
+
+        class Combined(Left, Right, Mixin):
+            c = Field(MagicMock())
+
+        self.assertEqual(['field', 'a', 'b', 'c'], list(Combined.fields))
+        self.assertIs(overriden_field, Combined.fields['field'])
+
 
 class TestModel(TestCase):
     def test_setting_default_in_constructor(self):
@@ -101,6 +127,57 @@ class TestModel(TestCase):
         self.assertEqual(20, TestModel(a=20).a)
         self.assertEqual(0, mock_field.create_default_value.call_count)
 
+    def test_lazy_defaults(self):
+        mock_field = MagicMock(spec=Field)
+        mock_field.create_default_value = MagicMock(return_value=10)
+
+        class TestModel(Model):
+            lazy_defaults = True
+            a = mock_field
+
+        model = TestModel()
+        self.assertEqual(0, mock_field.create_default_value.call_count)
+        self.assertEqual(10, model.a)
+        self.assertEqual(10, model.a)
+        self.assertEqual(1, mock_field.create_default_value.call_count)
+
+        mock_field.reset_mock()
+        self.assertEqual(20, TestModel(a=20).a)
+        self.assertEqual(0, mock_field.create_default_value.call_count)
+
+        with self.assertRaises(AttributeError):
+            model.unknown
+
+    def test_construct(self):
+        mock_field = MagicMock(spec=Field)
+        mock_field.create_default_value = MagicMock(return_value=10)
+        mock_type = MagicMock()
+
+        class TestModel(Model):
+            a = mock_field
+            b = Field(mock_type)
+
+        values = [1, 2]
+        model = TestModel.construct(b=values, unknown=1)
+        self.assertEqual(10, model.a)
+        self.assertIs(values, model.b)
+        self.assertFalse(hasattr(model, 'unknown'))
+        self.assertEqual(1, mock_field.create_default_value.call_count)
+        self.assertEqual(0, mock_type.validate.call_count)
+
+        mock_field.reset_mock()
+        self.assertEqual(20, TestModel.construct(a=20).a)
+        self.assertEqual(0, mock_field.create_default_value.call_count)
+
+    def test_construct_lazy_defaults(self):
+        class TestModel(Model):
+            lazy_defaults = True
+            a = Field(StringType(), default='abc')
+
+        model = TestModel.construct()
+        self.assertNotIn('a', model.__dict__)
+        self.assertEqual('abc', model.a)
+
     def test_equals(self):
         class TestModel(Model):
             a = Field(MagicMock())
@@ -166,6 +243,156 @@ class TestModel(TestCase):
         self.assertEqual(e.exception.sub_errors['b'].errors, [error_b])
 
 
+class TestFrozenModel(TestCase):
+    def setUp(self):
+        class Reference(FrozenModel):
+            code = Field(StringType())
+            aliases = Field(ListType(StringType()))
+            tags = Field(SetType(StringType()))
+            names = Field(DictType(StringType(), StringType()))
+
+        class Document(FrozenModel):
+            references = Field(ListType(ModelType(Reference)))
+
+        self.reference_class = Reference
+        self.document_class = Document
+
+    def test_cannot_be_modified(self):
+        reference = self.reference_class(code='abc')
+        with self.assertRaises(AttributeError):
+            reference.code = 'def'
+        with self.assertRaises(AttributeError):
+            del reference.code
+        self.assertEqual('abc', reference.code)
+
+    def test_freezes_containers(self):
+        reference = self.reference_class(code='abc', aliases=['a'], tags={'b'}, names={'en': 'ABC'})
+        with self.assertRaises(TypeError):
+            reference.aliases.append('x')
+        with self.assertRaises(TypeError):
+            reference.tags.add('x')
+        with self.assertRaises(TypeError):
+            reference.names['sk'] = 'x'
+        self.assertEqual(['a'], reference.aliases)
+        self.assertEqual({'b'}, reference.tags)
+        self.assertEqual({'en': 'ABC'}, reference.names)
+        reference.validate()
+
+    def test_construct_freezes_containers(self):
+        reference = self.reference_class.construct(code='abc', aliases=['a'], tags={'b'})
+        with self.assertRaises(TypeError):
+            reference.aliases.append('x')
+        with self.assertRaises(AttributeError):
+            reference.code = 'def'
+        self.assertEqual(self.reference_class(code='abc', aliases=['a'], tags={'b'}), reference)
+        self.assertEqual({}, reference.names)
+        hash(reference)
+
+    def test_hashable(self):
+        a = self.reference_class(code='abc', aliases=['a'], tags={'b'}, names={'en': 'ABC'})
+        b = self.reference_class(code='abc', aliases=['a'], tags={'b'}, names={'en': 'ABC'})
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(1, len({a, b}))
+
+    def test_rejects_mutable_submodels(self):
+        class Mutable(Model):
+            pass
+
+        class Holder(FrozenModel):
+            sub = Field(ModelType(Mutable))
+
+        with self.assertRaises(TypeError):
+            Holder(sub=Mutable())
+
+    def test_caches_validation(self):
+        reference = self.reference_class(code='abc')
+        document = self.document_class(references=[reference, reference])
+        code_type = self.reference_class.fields['code'].type
+        code_type.validate = MagicMock()
+
+        document.validate()
+        document.validate()
+        self.assertEqual(1, code_type.validate.call_count)
+
+    def test_does_not_cache_failed_validation(self):
+        reference = self.reference_class(code=None)
+        for _ in range(2):
+            with self.assertRaises(ValidationError):
+                reference.validate()
+
+
+class TestCachedModel(TestCase):
+    def setUp(self):
+        class Item(CachedModel):
+            name = Field(StringType())
+
+        class Container(CachedModel):
+            items = Field(DictType(StringType(), ModelType(Item)))
+
+        self.item = Item(name='a')
+        self.container = Container(items={'a': self.item})
+
+    def test_stores_values(self):
+        self.assertIsNone(get_cached_serialization(self.item, 'key'))
+        set_cached_serialization(self.item, 'key', 'value')
+        self.assertEqual('value', get_cached_serialization(self.item, 'key'))
+
+    def test_assignment_invalidates(self):
+        set_cached_serialization(self.item, 'key', 'value')
+        self.item.name = 'b'
+        self.assertIsNone(get_cached_serialization(self.item, 'key'))
+
+    def test_nested_assignment_invalidates_parents(self):
+        set_cached_serialization(self.item, 'key', 'value')
+        set_cached_serialization(self.container, 'key', 'value')
+        self.item.name = 'b'
+        self.assertIsNone(get_cached_serialization(self.container, 'key'))
+
+    def test_construct_links_children(self):
+        item = type(self.item).construct(name='a')
+        container = type(self.container).construct(items={'a': item})
+        set_cached_serialization(item, 'key', 'value')
+        set_cached_serialization(container, 'key', 'value')
+        item.name = 'b'
+        self.assertIsNone(get_cached_serialization(container, 'key'))
+
+    def test_other_attributes_do_not_invalidate(self):
+        set_cached_serialization(self.item, 'key', 'value')
+        self.item.note = 'not a field'
+        self.assertEqual('value', get_cached_serialization(self.item, 'key'))
+
+    def test_caches_serialization(self):
+        class Plain(Model):
+            name = Field(StringType())
+
+        class Frozen(FrozenModel):
+            name = Field(StringType())
+
+        class Node(CachedModel):
+            children = Field(ListType(ModelType(__name__ + '.CachedNode')))
+            frozen = Field(SetType(ModelType(Frozen)))
+
+        class Holder(CachedModel):
+            plain = Field(DictType(StringType(), ModelType(Plain)))
+
+        class Either(PolymorphicModel):
+            types_to_model_classes = {'item': type(self.item), 'plain': Plain}
+
+        class PolymorphicHolder(CachedModel):
+            value = Field(ModelType(Either))
+
+        globals()['CachedNode'] = Node
+        try:
+            self.assertTrue(caches_serialization(Node))
+        finally:
+            del globals()['CachedNode']
+        self.assertTrue(caches_serialization(type(self.container)))
+        self.assertFalse(caches_serialization(Holder))
+        self.assertFalse(caches_serialization(PolymorphicHolder))
+        self.assertFalse(caches_serialization(Plain))
+
+
 class TestPolymorphicModel(TestCase):
     def setUp(self):
         class TestModelA(Model):
@@ -237,6 +464,8 @@ class TestGlobals(TestCase):
         self.assertIs(Model, get_model_class_for_type(Polymorphic, 'a'))
         with self.assertRaises(ValidationError):
             get_model_class_for_type(Polymorphic, 'b')
+        with self.assertRaises(ValidationError):
+            get_model_class_for_type(Polymorphic, ['a'])
 
     def test_get_model_type_for_class(self):
         class Polymorphic(PolymorphicModel):
@@ -266,3 +495,86 @@ class TestGlobals(TestCase):
             type_specifier_name = 'another_type'
 
         self.assertEqual('another_type', get_type_specifier_name(Polymorphic2))
+
+
+class PickledItem(Model):
+    name = Field(StringType())
+    tags = Field(ListType(StringType()))
+
+
+class PickledLazyItem(Model):
+    lazy_defaults = True
+    name = Field(StringType())
+    tags = Field(ListType(StringType()))
+
+
+class PickledFrozenItem(FrozenModel):
+    name = Field(StringType())
+    tags = Field(ListType(StringType()))
+
+
+class PickledCachedItem(CachedModel):
+    name = Field(StringType())
+
+
+class PickledCachedContainer(CachedModel):
+    items = Field(ListType(ModelType(PickledCachedItem)))
+
+
+class TestPickling(TestCase):
+    def test_round_trip(self):
+        item = PickledItem(name='a', tags=['x', 'y'])
+        data = pickle.dumps(item)
+        self.assertNotIn(b'tags', data)
+        self.assertEqual(item, pickle.loads(data))
+
+    def test_keeps_extra_attributes(self):
+        item = PickledItem(name='a')
+        item.note = 'note'
+        self.assertEqual('note', pickle.loads(pickle.dumps(item)).note)
+
+    def test_lazy_defaults(self):
+        restored = pickle.loads(pickle.dumps(PickledLazyItem(name='a')))
+        self.assertEqual({'name': 'a'}, restored.__dict__)
+        self.assertEqual([], restored.tags)
+
+    def test_frozen(self):
+        item = PickledFrozenItem(name='a', tags=['x'])
+        item.validate()
+        restored = pickle.loads(pickle.dumps(item))
+        self.assertEqual(item, restored)
+        self.assertEqual(hash(item), hash(restored))
+        self.assertNotIn('_validated', restored.__dict__)
+        self.assertNotIn(b'_hash', pickle.dumps(item))
+        with self.assertRaises(TypeError):
+            restored.tags.append('y')
+
+    def test_cached(self):
+        container = PickledCachedContainer(items=[PickledCachedItem(name='a')])
+        set_cached_serialization(container, 'key', 'value')
+        set_cached_serialization(container.items[0], 'key', 'value')
+
+        restored = pickle.loads(pickle.dumps(container))
+        self.assertEqual(container, restored)
+        self.assertIsNone(get_cached_serialization(restored, 'key'))
+
+        set_cached_serialization(restored, 'key', 'value')
+        set_cached_serialization(restored.items[0], 'key', 'value')
+        restored.items[0].name = 'b'
+        self.assertIsNone(get_cached_serialization(restored, 'key'))
+
+    def test_batch(self):
+        items = [PickledItem(name='item{}'.format(i), tags=['x']) for i in range(100)]
+        data = pickle.dumps(ModelBatch(items))
+        self.assertLess(len(data), len(pickle.dumps(items)))
+        restored = pickle.loads(data)
+        self.assertIsInstance(restored, ModelBatch)
+        self.assertEqual(items, restored)
+
+    def test_batch_fallback(self):
+        extra = PickledItem(name='b')
+        extra.note = 'note'
+        for items in ([], [PickledItem(name='a'), PickledFrozenItem(name='b')], [PickledItem(name='a'), extra], [1]):
+            restored = pickle.loads(pickle.dumps(ModelBatch(items)))
+            self.assertIsInstance(restored, ModelBatch)
+            self.assertEqual(items, restored)
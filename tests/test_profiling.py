@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from threading import Thread
+from unittest import TestCase
+from justamodel.model import Model, Field
+from justamodel.profiling import Profiler, profile_validation
+from justamodel.serializer import DictModelSerializer
+from justamodel.types import StringType, IntType, ListType, ModelType
+
+
+class Item(Model):
+    name = Field(StringType())
+    count = Field(IntType())
+
+
+class Container(Model):
+    items = Field(ListType(ModelType(Item)))
+
+
+class TestProfiler(TestCase):
+    def setUp(self):
+        self.model = Container(items=[Item(name='a', count=1), Item(name='bc', count=2)])
+
+    def test_serialization(self):
+        profiler = Profiler()
+        serializer = DictModelSerializer(profiler=profiler)
+        data = serializer.serialize_model(self.model)
+        serializer.deserialize_model(data, Container)
+
+        stats = profiler.as_dict()
+        self.assertEqual({'serialize', 'deserialize'}, set(stats.keys()))
+
+        items_stats = stats['serialize']['fields']['Container']['items']
+        self.assertEqual(1, items_stats['calls'])
+        self.assertEqual(2, items_stats['items'])
+        self.assertGreaterEqual(items_stats['time'], 0)
+
+        name_stats = stats['deserialize']['fields']['Item']['name']
+        self.assertEqual(2, name_stats['calls'])
+        self.assertEqual(3, name_stats['items'])
+
+        self.assertEqual(2, stats['serialize']['types']['IntType']['calls'])
+        self.assertEqual(1, stats['serialize']['types']['ListType']['calls'])
+
+    def test_validation(self):
+        profiler = Profiler()
+        with profile_validation(profiler):
+            self.model.validate()
+        self.model.validate()
+
+        stats = profiler.as_dict()
+        self.assertEqual(['validate'], list(stats.keys()))
+        self.assertEqual(2, stats['validate']['fields']['Item']['count']['calls'])
+        self.assertEqual(1, stats['validate']['fields']['Container']['items']['calls'])
+
+    def test_validation_other_thread(self):
+        profiler = Profiler()
+        with profile_validation(profiler):
+            thread = Thread(target=self.model.validate)
+            thread.start()
+            thread.join()
+        self.assertEqual({}, profiler.as_dict())
+
+    def test_reset(self):
+        profiler = Profiler()
+        DictModelSerializer(profiler=profiler).serialize_model(self.model)
+        self.assertTrue(profiler.as_dict())
+        profiler.reset()
+        self.assertEqual({}, profiler.as_dict())
+
+    def test_disabled(self):
+        serializer = DictModelSerializer()
+        self.assertIsNone(serializer.profiler)
+        self.assertEqual({'items': [{'name': 'a', 'count': 1}, {'name': 'bc', 'count': 2}]},
+                         serializer.serialize_model(self.model))
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import TestCase
+from justamodel.exceptions import ValidationError
+from justamodel.model import Model, Field, PolymorphicModel
+from justamodel.records import RecordReader, RecordWriter, write_records
+from justamodel.types import StringType, IntType
+
+
+class Item(Model):
+    name = Field(StringType())
+    count = Field(IntType())
+
+
+class OtherItem(Model):
+    label = Field(StringType())
+
+
+class AnyItem(PolymorphicModel):
+    types_to_model_classes = {
+        'item': Item,
+        'other': OtherItem,
+    }
+
+
+class TestRecords(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_read_by_index(self):
+        items = [Item(name='item{}'.format(i), count=i) for i in range(10)]
+        write_records(self.path, items)
+
+        with RecordReader(self.path, Item) as reader:
+            self.assertEqual(10, len(reader))
+            self.assertEqual(items[0], reader[0])
+            self.assertEqual(items[7], reader[7])
+            self.assertEqual(items[9], reader[-1])
+            self.assertEqual(items, list(reader))
+            with self.assertRaises(IndexError):
+                reader[10]
+
+    def test_read_trusted(self):
+        items = [Item(name='item{}'.format(i), count=i) for i in range(3)]
+        write_records(self.path, items)
+
+        with RecordReader(self.path, Item, trusted=True) as reader:
+            self.assertEqual(items, list(reader))
+
+    def test_read_by_key(self):
+        items = [Item(name='item{}'.format(i), count=i) for i in range(10)]
+        write_records(self.path, items, key=lambda item: item.name)
+
+        with RecordReader(self.path, Item) as reader:
+            for item in items:
+                self.assertEqual(item, reader.get(item.name))
+            self.assertIn('item3', reader)
+            self.assertNotIn('item10', reader)
+            self.assertIsNone(reader.get('missing'))
+            self.assertEqual(3, reader.find('item3'))
+
+    def test_partial_keys(self):
+        with open(self.path, 'wb') as f, RecordWriter(f) as writer:
+            writer.write(Item(name='a', count=1))
+            writer.write(Item(name='b', count=2), key='b')
+
+        with RecordReader(self.path, Item) as reader:
+            self.assertEqual(2, len(reader))
+            self.assertEqual(Item(name='b', count=2), reader.get('b'))
+            self.assertIsNone(reader.find('a'))
+
+    def test_duplicate_key(self):
+        with open(self.path, 'wb') as f, RecordWriter(f) as writer:
+            writer.write(Item(name='a', count=1), key='a')
+            with self.assertRaises(ValueError):
+                writer.write(Item(name='a', count=1), key='a')
+
+    def test_polymorphic(self):
+        items = [Item(name='a', count=1), OtherItem(label='b')]
+        write_records(self.path, items, model_type=AnyItem)
+
+        with RecordReader(self.path, AnyItem) as reader:
+            self.assertEqual(items, list(reader))
+
+    def test_empty(self):
+        write_records(self.path, [])
+
+        with RecordReader(self.path, Item) as reader:
+            self.assertEqual(0, len(reader))
+            self.assertIsNone(reader.get('a'))
+
+    def test_failed_write(self):
+        def items():
+            yield Item(name='a', count=1)
+            yield Item(name='b', count=2)
+            raise RuntimeError('source failed')
+
+        with self.assertRaises(RuntimeError):
+            write_records(self.path, items())
+        with self.assertRaises(ValidationError):
+            RecordReader(self.path, Item)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a record file, just some text')
+
+        with self.assertRaises(ValidationError):
+            RecordReader(self.path, Item)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from justamodel.exceptions import ModelValidationError
+from justamodel.model import Model, Field, FrozenModel, PolymorphicModel
+from justamodel.schema import validate_payload, json_schema
+from justamodel.serializer import DictModelSerializer, JsonModelSerializer
+from justamodel.types import StringType, IntType, UrlType, ListType, SetType, DictType, ModelType, DateTimeType
+
+
+class Item(Model):
+    name = Field(StringType(min_length=2))
+    count = Field(IntType(max_value=5))
+
+
+class Document(Model):
+    title = Field(StringType(regex='^[a-z]+$'))
+    link = Field(UrlType(), required=False)
+    items = Field(ListType(ModelType(Item), max_length=2))
+    tags = Field(DictType(StringType(), IntType()))
+    codes = Field(SetType(StringType(min_length=2)))
+    sub = Field(ModelType(Item), required=False)
+    created = Field(DateTimeType(), required=False)
+
+
+class Node(Model):
+    name = Field(StringType())
+    child = Field(ModelType(__name__ + '.Node'), required=False)
+
+
+class Circle(Model):
+    radius = Field(IntType(min_value=0))
+
+
+class Square(Model):
+    side = Field(IntType())
+
+
+class Shape(PolymorphicModel):
+    types_to_model_classes = {
+        'circle': Circle,
+        'square': Square,
+    }
+
+
+class Drawing(Model):
+    shapes = Field(ListType(ModelType(Shape)))
+
+
+class FrozenItem(FrozenModel):
+    name = Field(StringType())
+
+
+class FrozenHolder(Model):
+    items = Field(SetType(ModelType(FrozenItem), max_length=1))
+
+
+class Untyped(Model):
+    values = Field(SetType())
+
+
+def error_paths(error, path=()):
+    result = {}
+    if error.errors:
+        result[path] = [str(e) for e in error.errors]
+    for key, sub_error in error.sub_errors.items():
+        result.update(error_paths(sub_error, path + (key,)))
+    return result
+
+
+class TestValidatePayload(TestCase):
+    def assert_same_errors(self, payload, model_type, serializer=None):
+        serializer = serializer if serializer is not None else DictModelSerializer()
+        # Messages of containers contain their values, which are not deserialized by validate_payload
+        with self.assertRaises(ModelValidationError) as e:
+            serializer.deserialize_value(payload, ModelType(model_type)).validate()
+        expected = set(error_paths(e.exception))
+        self.assertTrue(expected)
+
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload(payload, model_type, serializer)
+        self.assertEqual(expected, set(error_paths(e.exception)))
+
+    def test_valid(self):
+        validate_payload({'title': 'abc', 'items': [{'name': 'ab', 'count': 1}], 'tags': {'a': 1}, 'codes': ['ab'],
+                          'sub': None}, Document)
+        validate_payload({'name': 'a', 'child': {'name': 'b'}}, Node)
+        validate_payload({'shapes': [{'type': 'circle', 'radius': 1}, {'type': 'square', 'side': 2}]}, Drawing)
+
+    def test_errors(self):
+        self.assert_same_errors({
+            'title': 'ABC',
+            'link': 10,
+            'items': [{'name': 'a', 'count': 1}, {'name': 'ok', 'count': 10}, None],
+            'tags': {'a': 'x', 'b': 1},
+            'codes': ['a', 'bb'],
+        }, Document)
+
+    def test_nested_errors(self):
+        self.assert_same_errors({'name': 'a', 'child': {'name': 'b', 'child': {'name': 1}}}, Node)
+        self.assert_same_errors({'shapes': [{'type': 'circle', 'radius': -1}, {'type': 'square'}]}, Drawing)
+
+    def test_polymorphic_errors(self):
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'shapes': [{'radius': 1}, {'type': 'triangle'}]}, Drawing)
+        self.assertEqual(['Polymorphic model requires type specifier'],
+                         [str(error) for error in e.exception.get_errors('shapes', 0)])
+        self.assertEqual(['triangle is not in allowed types'],
+                         [str(error) for error in e.exception.get_errors('shapes', 1)])
+
+    def test_invalid_payload(self):
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload(['x'], Document)
+        self.assertEqual(['Model deserialization requires mapping type'], [str(error) for error in e.exception.errors])
+
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'items': 'x', 'tags': ['x']}, Document)
+        self.assertTrue(e.exception.get_errors('items'))
+        self.assertTrue(e.exception.get_errors('tags'))
+
+    def test_unhashable_set_items(self):
+        validate_payload({'items': [{'name': 'a'}, {'name': 'b'}]}, FrozenHolder)
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'items': [{'name': 'a'}, {'name': 1}]}, FrozenHolder)
+        self.assertTrue(e.exception.get_errors('items', 1, 'name'))
+
+    def test_unhashable_type_specifier(self):
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'shapes': [{'type': []}]}, Drawing)
+        self.assertEqual(['[] is not in allowed types'], [str(error) for error in e.exception.get_errors('shapes', 0)])
+
+    def test_unhashable_items(self):
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'title': 'abc', 'items': [], 'tags': {}, 'codes': ['ab', {'a': 1}]}, Document)
+        self.assertEqual({('codes', 1)}, set(error_paths(e.exception)))
+
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload({'values': [1, [2]]}, Untyped)
+        self.assertEqual(['[2] is not hashable'], [str(error) for error in e.exception.get_errors('values', 1)])
+
+    def test_serializer_codecs(self):
+        serializer = JsonModelSerializer()
+        payload = {'title': 'abc', 'items': [], 'tags': {}, 'codes': [], 'created': '2020-01-01T00:00:00'}
+        validate_payload(payload, Document, serializer)
+        with self.assertRaises(ModelValidationError) as e:
+            validate_payload(payload, Document)
+        self.assertTrue(e.exception.get_errors('created'))
+
+        self.assert_same_errors(dict(payload, created='x'), Document, serializer)
+
+
+class TestJsonSchema(TestCase):
+    def test_model(self):
+        schema = json_schema(Item)
+        self.assertEqual('#/$defs/Item', schema['$ref'])
+        self.assertEqual({
+            'type': 'object',
+            'properties': {
+                'name': {'type': 'string', 'minLength': 2},
+                'count': {'type': 'integer', 'maximum': 5},
+            },
+            'required': ['name', 'count'],
+        }, schema['$defs']['Item'])
+
+    def test_types(self):
+        properties = json_schema(Document, datetime_format='epoch')['$defs']['Document']['properties']
+        self.assertEqual({'type': 'string', 'pattern': '^[a-z]+$'}, properties['title'])
+        self.assertEqual({'anyOf': [{'type': 'string', 'format': 'uri'}, {'type': 'null'}]}, properties['link'])
+        self.assertEqual({'type': 'array', 'items': {'$ref': '#/$defs/Item'}, 'maxItems': 2}, properties['items'])
+        self.assertEqual({'type': 'object', 'additionalProperties': {'type': 'integer'},
+                          'propertyNames': {'type': 'string'}}, properties['tags'])
+        self.assertEqual({'type': 'array', 'items': {'type': 'string', 'minLength': 2}, 'uniqueItems': True},
+                         properties['codes'])
+        self.assertEqual({'anyOf': [{'type': 'integer'}, {'type': 'null'}]}, properties['created'])
+        self.assertEqual(['title', 'items', 'tags', 'codes'], json_schema(Document)['$defs']['Document']['required'])
+
+    def test_recursive(self):
+        schema = json_schema(Node)
+        self.assertEqual(['Node'], list(schema['$defs']))
+        self.assertEqual({'anyOf': [{'$ref': '#/$defs/Node'}, {'type': 'null'}]},
+                         schema['$defs']['Node']['properties']['child'])
+
+    def test_polymorphic(self):
+        schema = json_schema(Drawing)
+        variants = schema['$defs']['Drawing']['properties']['shapes']['items']['oneOf']
+        self.assertEqual({'allOf': [
+            {'$ref': '#/$defs/Circle'},
+            {'type': 'object', 'properties': {'type': {'const': 'circle'}}, 'required': ['type']},
+        ]}, variants[0])
+        self.assertEqual({'Drawing', 'Circle', 'Square'}, set(schema['$defs']))
+
+    def test_unknown_datetime_format(self):
+        with self.assertRaises(ValueError):
+            json_schema(Item, datetime_format='unknown')
@@ -1,11 +1,16 @@
 from collections import OrderedDict
+import io
+import json
+from datetime import datetime, date, time, timezone, timedelta
 from unittest import TestCase
 import unittest
 from justamodel.exceptions import ValidationError, ModelValidationError
-from justamodel.model import Model, Field, PolymorphicModel
+from justamodel.model import Model, Field, FrozenModel, CachedModel, PolymorphicModel, validate_iterative
+from justamodel.profiling import Profiler
 from justamodel.serializer import DictModelSerializer, JsonModelSerializer, make_field_filter, \
-    iter_model_fields
-from justamodel.types import StringType, IntType, UrlType, ModelType, ListType, SetType, DictType
+    iter_model_fields, make_projection, Limits
+from justamodel.types import StringType, IntType, UrlType, ModelType, ListType, SetType, DictType, DateTimeType, \
+    DateType, TimeType
 
 
 class TestModel(Model):
@@ -60,6 +65,27 @@ class TestInheritedModel(TestModel):
     another_field = Field(StringType())
 
 
+class TestFrozenModel(FrozenModel):
+    name = Field(StringType())
+    values = Field(ListType(IntType()))
+
+
+class TestCustomInitModel(Model):
+    name = Field(StringType())
+    submodels = Field(ListType(ModelType(TestModelA)))
+
+    def __init__(self):
+        super().__init__()
+        self.seen = set()
+
+
+class TestCustomInitFrozenModel(FrozenModel):
+    name = Field(StringType())
+
+    def __init__(self):
+        super().__init__(name='default')
+
+
 class TestDictSerialization(TestCase):
     def setUp(self):
         self.serializer = DictModelSerializer()
@@ -299,6 +325,25 @@ class TestDictSerialization(TestCase):
                                                  'b': TestModelA(a_field='def', x=20)})
         self.assertEqual(expected, deserialized)
 
+    def test_deserialization_frozen(self):
+        deserialized = self.serializer.deserialize_model({'name': 'test', 'values': [1, 2]}, TestFrozenModel)
+        self.assertEqual(TestFrozenModel(name='test', values=[1, 2]), deserialized)
+        with self.assertRaises(TypeError):
+            deserialized.values.append(3)
+
+    def test_deserialization_custom_init(self):
+        serialized = {'name': 'test', 'submodels': [{'a_field': 'abc', 'x': 10}]}
+        for serializer in (self.serializer, DictModelSerializer(iterative=True)):
+            deserialized = serializer.deserialize_model(serialized, TestCustomInitModel)
+            self.assertEqual('test', deserialized.name)
+            self.assertEqual([TestModelA(a_field='abc', x=10)], deserialized.submodels)
+            self.assertEqual(set(), deserialized.seen)
+
+    def test_deserialization_custom_init_frozen(self):
+        for serializer in (self.serializer, DictModelSerializer(iterative=True)):
+            deserialized = serializer.deserialize_model({'name': 'test'}, TestCustomInitFrozenModel)
+            self.assertEqual('test', deserialized.name)
+
     def test_deserialization_validation_errors(self):
         serialized = {
             'string_field': 'aa',
@@ -343,14 +388,305 @@ class TestSerializationJson(TestCase):
         self.assertEqual(expected, deserialized)
 
     def test_deserialization_json_invalid(self):
-        with self.assertRaises(ValidationError):
+        with self.assertRaises(ModelValidationError) as e:
             self.serializer.deserialize_model('{invalid json', TestModel)
+        self.assertEqual(1, len(e.exception.errors))
+        self.assertTrue(str(e.exception.errors[0]).startswith('Value is not a valid JSON: '))
+
+    def test_deserialization_json_binary(self):
+        data = '{"string_field": "\u00e1", "int_field": 46}'.encode('utf-8')
+        expected = TestModel(string_field='\u00e1', int_field=46, url_field=None)
+        for value in (data, bytearray(data), memoryview(data), memoryview(b'xx' + data)[2:], io.BytesIO(data),
+                      io.StringIO(data.decode('utf-8'))):
+            self.assertEqual(expected, self.serializer.deserialize_model(value, TestModel))
+
+        with self.assertRaises(ModelValidationError):
+            self.serializer.deserialize_model(memoryview(b'"\xff"'), TestModel)
+        with self.assertRaises(TypeError):
+            self.serializer.deserialize_model(46, TestModel)
 
     def test_serialization_json(self):
         serialized = self.serializer.serialize_model(TestModel(string_field='a string', int_field=46, url_field='http://abc'))
         expected = '{"int_field": 46, "string_field": "a string", "url_field": "http://abc"}'
         self.assertEqual(expected, serialized)
 
+    def test_deserialization_json_composed(self):
+        deserialized = self.serializer.deserialize_model('{"name": "test", "submodel": {"a_field": "abc", "x": 10}}',
+                                                         TestComposedModel)
+        expected = TestComposedModel(name='test', submodel=TestModelA(a_field='abc', x=10))
+        self.assertEqual(expected, deserialized)
+
+
+class TestScalarContainers(TestCase):
+    def test_needs_conversion(self):
+        serializer = DictModelSerializer()
+        self.assertFalse(serializer.needs_conversion(IntType()))
+        self.assertFalse(serializer.needs_conversion(None))
+        self.assertFalse(serializer.needs_conversion(ListType(IntType())))
+        self.assertFalse(serializer.needs_conversion(DictType(StringType(), SetType(StringType()))))
+        self.assertTrue(serializer.needs_conversion(ModelType(TestModelA)))
+        self.assertTrue(serializer.needs_conversion(ListType(ModelType(TestModelA))))
+        self.assertTrue(serializer.needs_conversion(DictType(StringType(), ListType(ModelType(TestModelA)))))
+
+    def test_copies_scalar_containers(self):
+        serializer = DictModelSerializer()
+        values = [1, 2, 3]
+        for method in (serializer.serialize_value, serializer.deserialize_value):
+            result = method(values, ListType(IntType()))
+            self.assertEqual(values, result)
+            self.assertIsNot(values, result)
+        self.assertEqual({'a', 'b'}, serializer.deserialize_value(['a', 'b'], SetType(StringType())))
+        self.assertEqual({'a': 1}, serializer.serialize_value({'a': 1}, DictType(StringType(), IntType())))
+
+    def test_copies_nested_containers(self):
+        serializer = DictModelSerializer()
+        model = TestNestedContainers(ll=[[1]], dl={'a': [1]})
+        serialized = serializer.serialize_model(model)
+        serialized['ll'][0].append(99)
+        serialized['dl']['a'].append(99)
+        self.assertEqual(TestNestedContainers(ll=[[1]], dl={'a': [1]}), model)
+
+        data = {'ll': [[1]], 'dl': {'a': [1]}}
+        model = serializer.deserialize_model(data, TestNestedContainers)
+        model.ll[0].append(99)
+        model.dl['a'].append(99)
+        self.assertEqual({'ll': [[1]], 'dl': {'a': [1]}}, data)
+
+        # Trusted input is kept by reference at every level
+        model = serializer.deserialize_model(data, TestNestedContainers, trusted=True)
+        self.assertIs(data['ll'][0], model.ll[0])
+
+    def test_converts_items_of_custom_types(self):
+        serializer = UpperCaseSerializer()
+        model = TestCustomTypes(single='a', items=['b'], nested={'c': ['d']})
+        serialized = serializer.serialize_model(model)
+        self.assertEqual({'single': 'A', 'items': ['B'], 'nested': {'c': ['D']}}, serialized)
+        self.assertEqual(model, serializer.deserialize_model(serialized, TestCustomTypes))
+        self.assertTrue(DictModelSerializer().needs_conversion(ListType(UpperCaseType())))
+        self.assertFalse(DictModelSerializer().needs_conversion(ListType(UrlType())))
+
+    def test_passes_scalar_containers_by_reference(self):
+        serializer = DictModelSerializer(copy_containers=False)
+        values = [1, 2, 3]
+        self.assertIs(values, serializer.serialize_value(values, ListType(IntType())))
+        self.assertIs(values, serializer.deserialize_value(values, ListType(IntType())))
+        self.assertEqual({'a', 'b'}, serializer.deserialize_value(['a', 'b'], SetType(StringType())))
+
+
+class TestNestedContainers(Model):
+    ll = Field(ListType(ListType(IntType())))
+    dl = Field(DictType(StringType(), ListType(IntType())))
+
+
+class UpperCaseType(StringType):
+    pass
+
+
+class UpperCaseSerializer(DictModelSerializer):
+    def serialize_value(self, value, value_type, field=None, **kwargs):
+        if isinstance(value_type, UpperCaseType) and value is not None:
+            return value.upper()
+        return super().serialize_value(value, value_type, field=field, **kwargs)
+
+    def deserialize_value(self, value, value_type, field=None, **kwargs):
+        if isinstance(value_type, UpperCaseType) and value is not None:
+            return value.lower()
+        return super().deserialize_value(value, value_type, field=field, **kwargs)
+
+
+class TestCustomTypes(Model):
+    single = Field(UpperCaseType())
+    items = Field(ListType(UpperCaseType()))
+    nested = Field(DictType(StringType(), ListType(UpperCaseType())))
+
+
+class TestCachedItem(CachedModel):
+    name = Field(StringType())
+
+
+class TestCachedContainer(CachedModel):
+    name = Field(StringType())
+    items = Field(ListType(ModelType(TestCachedItem)))
+
+
+class TestPlainChild(Model):
+    name = Field(StringType())
+
+
+class TestCachedParent(CachedModel):
+    child = Field(ModelType(TestPlainChild))
+
+
+class TestSerializationCache(TestCase):
+    def setUp(self):
+        self.item = TestCachedItem(name='item')
+        self.model = TestCachedContainer(name='container', items=[self.item])
+
+    def test_caches_result(self):
+        serializer = JsonModelSerializer(sort_keys=True)
+        serialized = serializer.serialize_model(self.model)
+        self.assertEqual('{"items": [{"name": "item"}], "name": "container"}', serialized)
+        self.assertIs(serialized, serializer.serialize_model(self.model))
+
+        serializer = DictModelSerializer(share_cached=True)
+        serialized = serializer.serialize_model(self.model)
+        self.assertEqual({'name': 'container', 'items': [{'name': 'item'}]}, serialized)
+        self.assertIs(serialized, serializer.serialize_model(self.model))
+
+    def test_dicts_not_shared_by_default(self):
+        for serializer in (DictModelSerializer(), DictModelSerializer(iterative=True)):
+            serialized = serializer.serialize_model(self.model)
+            serialized['items'][0]['name'] = 'changed'
+            self.assertEqual({'name': 'container', 'items': [{'name': 'item'}]}, serializer.serialize_model(self.model))
+        self.assertNotIn('_serialized_cache', self.model.__dict__)
+
+    def test_not_cached_with_field_filter(self):
+        serializer = DictModelSerializer()
+        self.assertEqual({'name': 'container'}, serializer.serialize_model(self.model, fields=['name']))
+        self.assertIsNot(serializer.serialize_model(self.model, fields=['name']),
+                         serializer.serialize_model(self.model, fields=['name']))
+
+    def test_keyed_by_settings(self):
+        sorted_serialized = JsonModelSerializer(sort_keys=True).serialize_model(self.model)
+        unsorted_serialized = JsonModelSerializer(sort_keys=False).serialize_model(self.model)
+        self.assertEqual('{"items": [{"name": "item"}], "name": "container"}', sorted_serialized)
+        self.assertEqual('{"name": "container", "items": [{"name": "item"}]}', unsorted_serialized)
+
+        serialized = DictModelSerializer(mapping_type=OrderedDict).serialize_model(self.model)
+        self.assertIsInstance(serialized, OrderedDict)
+
+    def test_invalidated_by_assignment(self):
+        serializer = JsonModelSerializer(sort_keys=True)
+        serializer.serialize_model(self.model)
+        self.model.name = 'changed'
+        self.assertEqual('{"items": [{"name": "item"}], "name": "changed"}', serializer.serialize_model(self.model))
+
+    def test_invalidated_by_nested_assignment(self):
+        serializer = JsonModelSerializer(sort_keys=True)
+        serializer.serialize_model(self.model)
+        self.item.name = 'changed'
+        self.assertEqual('{"items": [{"name": "changed"}], "name": "container"}',
+                         serializer.serialize_model(self.model))
+
+    def test_linked_when_cached(self):
+        serializer = DictModelSerializer(share_cached=True)
+        model = TestCachedContainer(name='container', items=[])
+        model.items.append(self.item)
+        serializer.serialize_model(model)
+        self.item.name = 'changed'
+        self.assertEqual({'name': 'container', 'items': [{'name': 'changed'}]}, serializer.serialize_model(model))
+
+    def test_not_cached_with_plain_models(self):
+        model = TestCachedParent(child=TestPlainChild(name='a'))
+        serializers = (DictModelSerializer(share_cached=True), DictModelSerializer(iterative=True, share_cached=True),
+                       JsonModelSerializer())
+        for serializer in serializers:
+            serializer.serialize_model(model)
+            model.child.name = 'b'
+            self.assertIn('b', str(serializer.serialize_model(model)))
+            model.child.name = 'a'
+        self.assertNotIn('_serialized_cache', model.__dict__)
+
+    def test_keyed_by_copy_containers(self):
+        serialized = DictModelSerializer(share_cached=True).serialize_model(self.model)
+        self.assertIsNot(serialized,
+                         DictModelSerializer(copy_containers=False, share_cached=True).serialize_model(self.model))
+        self.assertIs(serialized, DictModelSerializer(share_cached=True).serialize_model(self.model))
+
+
+class TestDateTimeModel(Model):
+    created = Field(DateTimeType())
+    day = Field(DateType(), required=False)
+    at = Field(TimeType(), required=False)
+    history = Field(ListType(DateTimeType()), required=False)
+
+
+class TestNaiveDateTimeModel(Model):
+    created = Field(DateTimeType(min_value=datetime(2000, 1, 1)))
+
+
+class TestSerializationJsonDateTime(TestCase):
+    def setUp(self):
+        self.tz = timezone(timedelta(hours=2))
+        self.model = TestDateTimeModel(created=datetime(2020, 5, 6, 7, 8, 9, 123000, tzinfo=self.tz),
+                                       day=date(2020, 5, 6), at=time(7, 8, 9),
+                                       history=[datetime(2020, 1, 1, tzinfo=timezone.utc)])
+
+    def test_iso(self):
+        serializer = JsonModelSerializer(sort_keys=True)
+        serialized = serializer.serialize_model(self.model)
+        self.assertEqual('{"at": "07:08:09", "created": "2020-05-06T07:08:09.123000+02:00", "day": "2020-05-06", '
+                         '"history": ["2020-01-01T00:00:00+00:00"]}', serialized)
+        deserialized = serializer.deserialize_model(serialized, TestDateTimeModel)
+        self.assertEqual(self.model, deserialized)
+        deserialized.validate()
+
+    def test_iso_shares_timezones(self):
+        serializer = JsonModelSerializer()
+        serialized = serializer.serialize_model(self.model)
+        a = serializer.deserialize_model(serialized, TestDateTimeModel)
+        b = serializer.deserialize_model(serialized, TestDateTimeModel)
+        self.assertIs(a.created.tzinfo, b.created.tzinfo)
+
+    def test_iso_odd_offsets_not_shared(self):
+        serializer = JsonModelSerializer()
+        serialized = '{"created": "2020-01-02T03:04:05+01:00:30.5"}'
+        a = serializer.deserialize_model(serialized, TestDateTimeModel)
+        b = serializer.deserialize_model(serialized, TestDateTimeModel)
+        self.assertEqual(timedelta(hours=1, seconds=30, microseconds=500000), a.created.utcoffset())
+        self.assertEqual(a.created, b.created)
+        self.assertIsNot(a.created.tzinfo, b.created.tzinfo)
+
+    def test_iso_zulu(self):
+        deserialized = JsonModelSerializer().deserialize_model('{"created": "2020-05-06T07:08:09Z"}',
+                                                               TestDateTimeModel)
+        self.assertEqual(datetime(2020, 5, 6, 7, 8, 9, tzinfo=timezone.utc), deserialized.created)
+
+    def test_epoch(self):
+        serializer = JsonModelSerializer(datetime_format='epoch')
+        model = TestDateTimeModel(created=datetime(2020, 5, 6, 7, 8, 9, tzinfo=timezone.utc),
+                                  history=[datetime(1970, 1, 1, 0, 0, 1)])
+        serialized = serializer.serialize_model(model)
+        self.assertEqual('{"created": 1588748889, "day": null, "at": null, "history": [1]}', serialized)
+        deserialized = serializer.deserialize_model(serialized, TestDateTimeModel)
+        self.assertEqual(model.created, deserialized.created)
+        self.assertEqual([datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)], deserialized.history)
+
+    def test_epoch_ms(self):
+        serializer = JsonModelSerializer(datetime_format='epoch_ms')
+        serialized = serializer.serialize_model(self.model)
+        self.assertIn('"created": 1588741689123', serialized)
+        self.assertEqual(self.model.created, serializer.deserialize_model(serialized, TestDateTimeModel).created)
+
+    def test_epoch_naive(self):
+        model = TestNaiveDateTimeModel(created=datetime(2020, 5, 6, 7, 8, 9, 123000))
+        for datetime_format in ('epoch', 'epoch_ms'):
+            serializer = JsonModelSerializer(datetime_format=datetime_format, naive_datetimes=True)
+            deserialized = serializer.deserialize_model(serializer.serialize_model(model), TestNaiveDateTimeModel)
+            self.assertIsNone(deserialized.created.tzinfo)
+            deserialized.validate()
+        self.assertEqual(model, deserialized)
+
+        # Aware values keep their instant
+        aware = datetime(2020, 5, 6, 7, 8, 9, tzinfo=self.tz)
+        serializer = JsonModelSerializer(datetime_format='epoch', naive_datetimes=True)
+        deserialized = serializer.deserialize_model(
+            serializer.serialize_model(TestNaiveDateTimeModel(created=aware)), TestNaiveDateTimeModel)
+        self.assertEqual(datetime(2020, 5, 6, 5, 8, 9), deserialized.created)
+
+        with self.assertRaises(ValueError):
+            JsonModelSerializer(naive_datetimes=True)
+
+    def test_invalid(self):
+        with self.assertRaises(ModelValidationError) as e:
+            JsonModelSerializer().deserialize_model('{"created": "yesterday", "day": 10}', TestDateTimeModel)
+        self.assertIn('created', e.exception.sub_errors)
+        self.assertIn('day', e.exception.sub_errors)
+        with self.assertRaises(ValidationError):
+            JsonModelSerializer(datetime_format='epoch').deserialize_model('{"created": "1"}', TestDateTimeModel)
+        with self.assertRaises(ValueError):
+            JsonModelSerializer(datetime_format='unknown')
+
 
 class TestFieldFiltering(TestCase):
     def test_make_filter_none(self):
@@ -383,3 +719,519 @@ class TestFieldFiltering(TestCase):
                                   ('int_field', TestModel.fields['int_field']),
                                   ('url_field', TestModel.fields['url_field']),
                                   ])
+
+
+class TestProjection(TestCase):
+    def setUp(self):
+        self.serializer = DictModelSerializer()
+        self.model = TestComposedModel5(name='test', submodels={'a': TestModelA(a_field='abc', x=10),
+                                                                'b': TestModelA(a_field='def', x=20)})
+
+    def test_iter_fields(self):
+        fields = list(iter_model_fields(TestModel, fields=make_projection(['url_field', 'string_field.x'])))
+        self.assertEqual(fields, [('string_field', TestModel.fields['string_field']),
+                                  ('url_field', TestModel.fields['url_field']),
+                                  ])
+
+    def test_serialization_nested(self):
+        projection = make_projection(['submodels.x'])
+        self.assertEqual({'submodels': {'a': {'x': 10}, 'b': {'x': 20}}},
+                         self.serializer.serialize_model(self.model, fields=projection))
+
+    def test_serialization_wildcard(self):
+        projection = make_projection(['name', 'submodels.*.a_field'])
+        self.assertEqual({'name': 'test', 'submodels': {'a': {'a_field': 'abc'}, 'b': {'a_field': 'def'}}},
+                         self.serializer.serialize_model(self.model, fields=projection))
+
+    def test_serialization_whole_subtree(self):
+        projection = make_projection(['submodels', 'submodels.x'])
+        self.assertEqual({'submodels': {'a': {'a_field': 'abc', 'x': 10}, 'b': {'a_field': 'def', 'x': 20}}},
+                         self.serializer.serialize_model(self.model, fields=projection))
+
+    def test_serialization_list(self):
+        model = TestComposedModel3(name='test', submodels=[TestModelA(a_field='abc', x=10)])
+        projection = make_projection(['submodels.x', 'submodels.*.a_field'])
+        self.assertEqual({'submodels': [{'a_field': 'abc', 'x': 10}]},
+                         self.serializer.serialize_model(model, fields=projection))
+
+    def test_deserialization_nested(self):
+        serialized = {
+            'name': 'test',
+            'submodels': [{'a_field': 'abc', 'x': 10}, {'a_field': 'def', 'x': 20}]
+        }
+        deserialized = self.serializer.deserialize_model(serialized, TestComposedModel3,
+                                                         fields=make_projection(['submodels.x']))
+        self.assertEqual(TestComposedModel3(submodels=[TestModelA(x=10), TestModelA(x=20)]), deserialized)
+
+    def test_flat_filter_does_not_apply_to_items(self):
+        model = TestComposedModel3(name='test', submodels=[TestModelA(a_field='abc', x=10)])
+        self.assertEqual({'submodels': [{'a_field': 'abc', 'x': 10}]},
+                         self.serializer.serialize_model(model, fields=['submodels']))
+
+    def test_flat_filter_does_not_apply_to_nested_models(self):
+        model = TestComposedModel(name='test', submodel=TestModelA(a_field='abc', x=10))
+        self.assertEqual({'submodel': {'a_field': 'abc', 'x': 10}},
+                         self.serializer.serialize_model(model, fields=['submodel']))
+        deserialized = self.serializer.deserialize_model({'name': 'test', 'submodel': {'a_field': 'abc', 'x': 10}},
+                                                         TestComposedModel, fields=['submodel'])
+        self.assertEqual(TestComposedModel(submodel=TestModelA(a_field='abc', x=10)), deserialized)
+
+
+class TestFusedItem(Model):
+    name = Field(StringType(min_length=2))
+    count = Field(IntType(max_value=5))
+
+
+class TestFusedModel(Model):
+    title = Field(StringType())
+    items = Field(ListType(ModelType(TestFusedItem), max_length=5))
+    tags = Field(DictType(StringType(), IntType()))
+    codes = Field(SetType(StringType(min_length=2)))
+    values = Field(ListType(IntType()))
+    sub = Field(ModelType(TestFusedItem), required=False)
+    required_sub = Field(ModelType(TestFusedItem))
+
+
+def error_paths(error, path=()):
+    result = {}
+    if error.errors:
+        result[path] = [str(e) for e in error.errors]
+    for key, sub_error in error.sub_errors.items():
+        result.update(error_paths(sub_error, path + (key,)))
+    return result
+
+
+class TestFusedValidation(TestCase):
+    def setUp(self):
+        self.serializer = DictModelSerializer()
+
+    def assert_same_errors(self, serialized, model_class=TestFusedModel):
+        with self.assertRaises(ModelValidationError) as e:
+            self.serializer.deserialize_model(serialized, model_class).validate()
+        expected = error_paths(e.exception)
+        self.assertTrue(expected)
+
+        with self.assertRaises(ModelValidationError) as e:
+            self.serializer.deserialize_model(serialized, model_class, validate=True)
+        self.assertEqual(expected, error_paths(e.exception))
+
+    def test_valid(self):
+        serialized = {
+            'title': 'test',
+            'items': [{'name': 'ab', 'count': 1}],
+            'tags': {'a': 1},
+            'codes': {'ab'},
+            'values': [1, 2],
+            'required_sub': {'name': 'cd', 'count': 2},
+        }
+        deserialized = self.serializer.deserialize_model(serialized, TestFusedModel, validate=True)
+        self.assertEqual(self.serializer.deserialize_model(serialized, TestFusedModel), deserialized)
+
+    def test_nested_errors(self):
+        self.assert_same_errors({
+            'title': 10,
+            'items': [{'name': 'a', 'count': 1}, {'name': 'ok', 'count': 10}, None],
+            'tags': {'a': 'x', 'b': 1, 3: 4},
+            'codes': {'a', 'bb'},
+            'values': [1, 'x'],
+            'sub': None,
+        })
+
+    def test_container_errors(self):
+        self.assert_same_errors({
+            'title': 'test',
+            'items': [{'name': 'ab', 'count': 1}] * 6,
+            'tags': None,
+            'codes': {'ab'},
+            'values': 'x',
+            'required_sub': {'name': 'cd', 'count': 20},
+        })
+
+    def test_invalid_mapping(self):
+        with self.assertRaises(ModelValidationError) as e:
+            self.serializer.deserialize_model({'items': ['x']}, TestFusedModel, validate=True)
+        self.assertTrue(e.exception.get_errors('items', 0))
+
+    def test_json_codecs(self):
+        serializer = JsonModelSerializer()
+        deserialized = serializer.deserialize_model('{"created": "2020-01-01T00:00:00", "history": []}',
+                                                    TestDateTimeModel, validate=True)
+        self.assertEqual(datetime(2020, 1, 1), deserialized.created)
+
+        with self.assertRaises(ModelValidationError) as e:
+            serializer.deserialize_model('{"created": "2020-01-01T00:00:00", "history": ["x"]}',
+                                         TestDateTimeModel, validate=True)
+        self.assertTrue(e.exception.get_errors('history', 0))
+
+
+class TestTrustedDeserialization(TestCase):
+    def test_same_result(self):
+        serializer = DictModelSerializer()
+        serialized = {'name': 'a', 'submodels': [{'a_field': 'x', 'x': 1}]}
+        self.assertEqual(serializer.deserialize_model(serialized, TestComposedModel3),
+                         serializer.deserialize_model(serialized, TestComposedModel3, trusted=True))
+
+        serializer = JsonModelSerializer()
+        serialized = '{"created": "2020-01-01T00:00:00", "history": ["2020-01-02T00:00:00"]}'
+        self.assertEqual(serializer.deserialize_model(serialized, TestDateTimeModel),
+                         serializer.deserialize_model(serialized, TestDateTimeModel, trusted=True))
+
+    def test_not_validated(self):
+        deserialized = DictModelSerializer().deserialize_model({'string_field': 1}, TestModel, trusted=True)
+        self.assertEqual(1, deserialized.string_field)
+        self.assertIsNone(deserialized.int_field)
+
+    def test_keeps_containers(self):
+        values = [1, 2]
+        deserialized = DictModelSerializer().deserialize_model({'name': 'a', 'values': values}, TestFrozenModel,
+                                                               trusted=True)
+        self.assertEqual(values, deserialized.values)
+        with self.assertRaises(TypeError):
+            deserialized.values.append(3)
+
+        serialized = {'name': 'a', 'submodels': {'a', 'b'}}
+        deserialized = DictModelSerializer().deserialize_model(serialized, TestComposedModel4, trusted=True)
+        self.assertIs(serialized['submodels'], deserialized.submodels)
+
+    def test_links_cached_models(self):
+        serializer = JsonModelSerializer(sort_keys=True)
+        model = serializer.deserialize_model('{"name": "container", "items": [{"name": "item"}]}',
+                                             TestCachedContainer, trusted=True)
+        serializer.serialize_model(model)
+        model.items[0].name = 'changed'
+        self.assertEqual('{"items": [{"name": "changed"}], "name": "container"}', serializer.serialize_model(model))
+
+
+class TestPrepare(TestCase):
+    def test_computes_plans(self):
+        serializer = JsonModelSerializer()
+        self.assertIs(serializer, serializer.prepare(TestComposedModel5, TestModelAB, TestDateTimeModel))
+        submodels_type = TestComposedModel5.fields['submodels'].type
+        self.assertIn(submodels_type, serializer._pass_through_cache)
+        self.assertIn(submodels_type.value_type, serializer._pass_through_cache)
+        self.assertIn(TestModelB.fields['y'].type, serializer._pass_through_cache)
+        self.assertTrue(serializer.needs_conversion(TestDateTimeModel.fields['history'].type))
+
+    def test_resolves_model_names(self):
+        class Node(Model):
+            child = Field(ModelType(__name__ + '.TestModelA'))
+
+        DictModelSerializer().prepare(Node)
+        self.assertIs(TestModelA, Node.fields['child'].type._model_class)
+
+
+class TestNode(Model):
+    name = Field(StringType())
+    children = Field(ListType(ModelType(__name__ + '.TestNode')), required=False)
+    attributes = Field(DictType(StringType(), ModelType(__name__ + '.TestNode')), required=False)
+    created = Field(DateTimeType(), required=False)
+
+
+def make_chain(depth):
+    node = None
+    for i in range(depth):
+        node = TestNode(name='node{}'.format(i), children=[node] if node is not None else [])
+    return node
+
+
+class TestIterative(TestCase):
+    def setUp(self):
+        self.tree = TestNode(name='root', created=datetime(2020, 1, 1), children=[
+            TestNode(name='a', children=[TestNode(name='b')], attributes={'x': TestNode(name='c')}),
+            TestNode(name='d'),
+        ])
+
+    def test_same_results(self):
+        for serializer_class in (DictModelSerializer, JsonModelSerializer):
+            serializer = serializer_class()
+            iterative = serializer_class(iterative=True)
+            serialized = serializer.serialize_model(self.tree)
+            self.assertEqual(serialized, iterative.serialize_model(self.tree))
+            self.assertEqual(serializer.deserialize_model(serialized, TestNode),
+                             iterative.deserialize_model(serialized, TestNode))
+            self.assertEqual(self.tree, iterative.deserialize_model(serialized, TestNode, trusted=True))
+
+    def test_deep_tree(self):
+        serializer = DictModelSerializer(iterative=True)
+        chain = make_chain(5000)
+        serialized = serializer.serialize_model(chain)
+        deserialized = serializer.deserialize_model(serialized, TestNode)
+        validate_iterative(deserialized)
+
+        for _ in range(4999):
+            deserialized = deserialized.children[0]
+        self.assertEqual('node0', deserialized.name)
+
+    def test_deep_tree_json(self):
+        serializer = JsonModelSerializer(iterative=True)
+        chain = make_chain(200)
+        self.assertEqual(chain, serializer.deserialize_model(serializer.serialize_model(chain), TestNode))
+
+        # The json module recurses, so the depth of JSON documents stays limited by the recursion limit
+        with self.assertRaises(ValueError):
+            serializer.serialize_model(make_chain(5000))
+        with self.assertRaises(ModelValidationError):
+            serializer.deserialize_model('{"children": [' * 5000 + '{}' + ']}' * 5000, TestNode)
+
+    def test_same_errors(self):
+        serialized = DictModelSerializer().serialize_model(self.tree)
+        serialized['children'][0]['children'][0]['name'] = 1
+        serialized['children'][0]['attributes']['x'] = 'x'
+        serialized['children'].append({'name': 'e', 'created': 'x'})
+        serializer = JsonModelSerializer()
+        iterative = JsonModelSerializer(iterative=True)
+        for data in (serialized, {'name': 'a', 'children': [None, 'x']}):
+            data = json.dumps(data, default=str)
+            with self.assertRaises(ModelValidationError) as e:
+                serializer.deserialize_model(data, TestNode)
+            expected = error_paths(e.exception)
+            self.assertTrue(expected)
+            with self.assertRaises(ModelValidationError) as e:
+                iterative.deserialize_model(data, TestNode)
+            self.assertEqual(expected, error_paths(e.exception))
+
+    def test_into_instance(self):
+        model = TestNode(name='x')
+        iterative = DictModelSerializer(iterative=True)
+        self.assertIs(model, iterative.deserialize_model({'name': 'y', 'children': [{'name': 'z'}]}, model))
+        self.assertEqual(TestNode(name='y', children=[TestNode(name='z')]), model)
+
+    def test_validate(self):
+        validate_iterative(self.tree)
+        invalid = TestNode(name='root', children=[TestNode(name=1), None], attributes={'x': TestNode(name=None)})
+        with self.assertRaises(ModelValidationError) as e:
+            invalid.validate()
+        expected = error_paths(e.exception)
+        self.assertEqual(3, len(expected))
+        with self.assertRaises(ModelValidationError) as e:
+            validate_iterative(invalid)
+        self.assertEqual(expected, error_paths(e.exception))
+
+    def test_profiling(self):
+        profiler = Profiler()
+        serializer = DictModelSerializer(iterative=True, profiler=profiler)
+        serialized = serializer.serialize_model(self.tree)
+        self.assertEqual(5, profiler.as_dict()['serialize']['fields']['TestNode']['name']['calls'])
+        self.assertEqual(self.tree, serializer.deserialize_model(serialized, TestNode))
+        self.assertEqual(5, profiler.as_dict()['deserialize']['fields']['TestNode']['name']['calls'])
+
+    def test_cached_models(self):
+        serializer = DictModelSerializer(iterative=True, share_cached=True)
+        model = TestCachedContainer(name='container', items=[TestCachedItem(name='item')])
+        serialized = serializer.serialize_model(model)
+        self.assertEqual({'name': 'container', 'items': [{'name': 'item'}]}, serialized)
+        self.assertIs(serialized, serializer.serialize_model(model))
+        self.assertIs(serialized['items'][0], serializer.serialize_model(model.items[0]))
+
+
+class TestGraphNode(Model):
+    name = Field(StringType())
+    links = Field(ListType(ModelType(__name__ + '.TestGraphNode')), required=False)
+
+
+class TestShapes(Model):
+    shapes = Field(ListType(ModelType(TestModelAB)))
+    frozen = Field(ListType(ModelType(TestFrozenModel)), required=False)
+
+
+class TestGraphHolder(Model):
+    nodes = Field(DictType(StringType(), ModelType(TestGraphNode)))
+    frozen = Field(DictType(StringType(), ModelType(TestFrozenModel)), required=False)
+
+
+class TestReferences(TestCase):
+    def setUp(self):
+        self.shared = TestGraphNode(name='shared', links=[])
+        self.graph = TestGraphNode(name='root', links=[
+            TestGraphNode(name='a', links=[self.shared]),
+            TestGraphNode(name='b', links=[self.shared]),
+        ])
+
+    def test_shared_models(self):
+        serializer = DictModelSerializer()
+        serialized = serializer.serialize_model(self.graph, references=True)
+        self.assertEqual({
+            'name': 'root',
+            'links': [
+                {'name': 'a', 'links': [{'$id': 1, 'name': 'shared', 'links': []}]},
+                {'name': 'b', 'links': [{'$ref': 1}]},
+            ],
+        }, serialized)
+
+        deserialized = serializer.deserialize_model(serialized, TestGraphNode, references=True)
+        self.assertEqual(self.graph, deserialized)
+        self.assertIs(deserialized.links[0].links[0], deserialized.links[1].links[0])
+
+    def test_cycles(self):
+        serializer = JsonModelSerializer()
+        self.shared.links.append(self.graph)
+        serialized = serializer.serialize_model(self.graph, references=True)
+        deserialized = serializer.deserialize_model(serialized, TestGraphNode, references=True)
+        shared = deserialized.links[0].links[0]
+        self.assertIs(deserialized, shared.links[0])
+        self.assertIs(shared, deserialized.links[1].links[0])
+        self.assertEqual('shared', shared.name)
+
+    def test_not_used_by_default(self):
+        serializer = DictModelSerializer()
+        serialized = serializer.serialize_model(self.graph, references=False)
+        self.assertEqual(serialized, serializer.serialize_model(self.graph))
+        self.assertNotIn('$id', str(serialized))
+        deserialized = serializer.deserialize_model(serialized, TestGraphNode)
+        self.assertIsNot(deserialized.links[0].links[0], deserialized.links[1].links[0])
+
+    def test_polymorphic_and_frozen(self):
+        shape = TestModelA(a_field='a', x=1)
+        frozen = TestFrozenModel(name='f', values=[1])
+        model = TestShapes(shapes=[shape, shape], frozen=[frozen, frozen])
+        serializer = DictModelSerializer()
+        serialized = serializer.serialize_model(model, references=True)
+        self.assertEqual({'$ref': 1}, serialized['shapes'][1])
+        deserialized = serializer.deserialize_model(serialized, TestShapes, references=True)
+        self.assertEqual(model, deserialized)
+        self.assertIs(deserialized.shapes[0], deserialized.shapes[1])
+        self.assertIs(deserialized.frozen[0], deserialized.frozen[1])
+
+    def test_sorted_keys(self):
+        frozen = TestFrozenModel(name='f', values=[1])
+        model = TestGraphHolder(nodes={'b': self.shared, 'a': self.shared}, frozen={'b': frozen, 'a': frozen})
+        serializer = JsonModelSerializer(sort_keys=True)
+        serialized = serializer.serialize_model(model, references=True)
+        self.assertLess(serialized.index('"$ref"'), serialized.index('"$id"'))
+
+        deserialized = serializer.deserialize_model(serialized, TestGraphHolder, references=True)
+        self.assertEqual(model, deserialized)
+        self.assertIs(deserialized.nodes['a'], deserialized.nodes['b'])
+        self.assertIs(deserialized.frozen['a'], deserialized.frozen['b'])
+
+    def test_invalid_references(self):
+        serializer = DictModelSerializer()
+        for links in ([{'$ref': 1}], [{'$id': 1, 'name': 'a'}, {'$ref': 2}], [{'$ref': []}], [{'$id': []}],
+                      [{'$id': 1, 'name': 'a'}, {'$id': 1, 'name': 'b'}]):
+            with self.assertRaises(ModelValidationError):
+                serializer.deserialize_model({'name': 'root', 'links': links}, TestGraphNode, references=True)
+
+        serialized = {'shapes': [{'$id': 1, 'type': 'a', 'a_field': 'a', 'x': 1}], 'frozen': [{'$ref': 1}]}
+        with self.assertRaises(ModelValidationError):
+            serializer.deserialize_model(serialized, TestShapes, references=True)
+
+
+class TestFrozenPair(FrozenModel):
+    left = Field(ModelType(TestFrozenModel))
+    right = Field(ModelType(TestFrozenModel))
+
+
+class TestInternedModels(Model):
+    pairs = Field(ListType(ModelType(TestFrozenPair)))
+    shapes = Field(ListType(ModelType(TestModelAB)), required=False)
+
+
+class TestInterning(TestCase):
+    def setUp(self):
+        item = {'name': 'a', 'values': [1, 2]}
+        self.serialized = {'pairs': [
+            {'left': item, 'right': dict(item)},
+            {'left': dict(item), 'right': {'name': 'b', 'values': []}},
+            {'left': dict(item), 'right': dict(item)},
+        ], 'shapes': [{'type': 'a', 'a_field': 'a', 'x': 1}, {'type': 'a', 'a_field': 'a', 'x': 1}]}
+
+    def assert_interned(self, model):
+        pairs = model.pairs
+        self.assertIs(pairs[0].left, pairs[0].right)
+        self.assertIs(pairs[0].left, pairs[1].left)
+        self.assertIsNot(pairs[1].left, pairs[1].right)
+        self.assertIs(pairs[0], pairs[2])
+        # Only frozen models are shared
+        self.assertIsNot(model.shapes[0], model.shapes[1])
+
+    def test_interning(self):
+        serializer = DictModelSerializer(intern_size=100)
+        model = serializer.deserialize_model(self.serialized, TestInternedModels)
+        self.assert_interned(model)
+        self.assertEqual(DictModelSerializer().deserialize_model(self.serialized, TestInternedModels), model)
+        self.assertEqual({'hits': 5, 'misses': 4, 'size': 4, 'maxsize': 100}, serializer.intern_table.info())
+
+        # The table is kept between calls
+        again = serializer.deserialize_model(self.serialized, TestInternedModels)
+        self.assertIs(model.pairs[0], again.pairs[0])
+        serializer.intern_table.clear()
+        self.assertEqual({'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 100}, serializer.intern_table.info())
+
+    def test_not_used_by_default(self):
+        self.assertIsNone(DictModelSerializer().intern_table)
+        model = DictModelSerializer().deserialize_model(self.serialized, TestInternedModels)
+        self.assertIsNot(model.pairs[0].left, model.pairs[0].right)
+
+    def test_iterative_and_trusted(self):
+        for serializer in (DictModelSerializer(intern_size=100, iterative=True),
+                           DictModelSerializer(intern_size=100)):
+            self.assert_interned(serializer.deserialize_model(self.serialized, TestInternedModels))
+            self.assert_interned(serializer.deserialize_model(self.serialized, TestInternedModels, trusted=True))
+        self.assert_interned(JsonModelSerializer(intern_size=100).deserialize_model(
+            json.dumps(self.serialized), TestInternedModels))
+
+    def test_bounded(self):
+        serializer = DictModelSerializer(intern_size=2)
+        items = [serializer.deserialize_model({'name': name, 'values': []}, TestFrozenModel) for name in 'abc']
+        self.assertEqual(2, serializer.intern_table.info()['size'])
+        self.assertIs(items[2], serializer.deserialize_model({'name': 'c', 'values': []}, TestFrozenModel))
+        self.assertIsNot(items[0], serializer.deserialize_model({'name': 'a', 'values': []}, TestFrozenModel))
+
+
+class TestLimits(TestCase):
+    def setUp(self):
+        self.serialized = {'name': 'root', 'links': [
+            {'name': 'a', 'links': [{'name': 'c', 'links': []}]},
+            {'name': 'b', 'links': []},
+        ]}
+
+    def assert_limit_error(self, message, serializer, value, model_type=TestGraphNode):
+        with self.assertRaises(ModelValidationError) as e:
+            serializer.deserialize_model(value, model_type)
+        self.assertEqual([message], [str(error) for error in e.exception.errors])
+
+    def test_within_limits(self):
+        limits = Limits(max_bytes=1000, max_depth=6, max_items=2, max_total_items=11)
+        expected = DictModelSerializer().deserialize_model(self.serialized, TestGraphNode)
+        for serializer in (DictModelSerializer(limits=limits), DictModelSerializer(limits=limits, iterative=True)):
+            self.assertEqual(expected, serializer.deserialize_model(self.serialized, TestGraphNode))
+        serializer = JsonModelSerializer(limits=limits)
+        self.assertEqual(expected, serializer.deserialize_model(json.dumps(self.serialized), TestGraphNode))
+
+    def test_depth(self):
+        self.assert_limit_error('Payload is nested deeper than 5 levels',
+                                DictModelSerializer(limits=Limits(max_depth=5)), self.serialized)
+        deep = {'name': 'x'}
+        for _ in range(10000):
+            deep = {'name': 'x', 'links': [deep]}
+        self.assert_limit_error('Payload is nested deeper than 100 levels',
+                                DictModelSerializer(limits=Limits(max_depth=100)), deep)
+
+    def test_items(self):
+        self.assert_limit_error('Container of 2 items exceeds the limit of 1 items',
+                                DictModelSerializer(limits=Limits(max_items=1)), self.serialized)
+        self.assert_limit_error('Payload has more than 10 items',
+                                DictModelSerializer(limits=Limits(max_total_items=10)), self.serialized)
+        self.assert_limit_error('Container of 3 items exceeds the limit of 2 items',
+                                DictModelSerializer(limits=Limits(max_items=2)), {'values': [1, 2, 3]},
+                                TestFrozenModel)
+
+    def test_bytes(self):
+        serializer = JsonModelSerializer(limits=Limits(max_bytes=20))
+        data = json.dumps(self.serialized)
+        for value in (data, data.encode('utf-8'), memoryview(data.encode('utf-8'))):
+            self.assert_limit_error('Payload is larger than 20 bytes', serializer, value)
+
+        class File(io.BytesIO):
+            def read(self, size=-1):
+                self.size = size
+                return super().read(size)
+
+        f = File(data.encode('utf-8'))
+        self.assert_limit_error('Payload is larger than 20 bytes', serializer, f)
+        self.assertEqual(21, f.size)
+        self.assertEqual('x', serializer.deserialize_model(io.BytesIO(b'{"name": "x"}'), TestGraphNode).name)
+
+    def test_json_nesting(self):
+        with self.assertRaises(ModelValidationError):
+            JsonModelSerializer().deserialize_model('[' * 100000 + ']' * 100000, TestGraphNode)
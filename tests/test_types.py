@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from importlib import import_module
 import re
 from datetime import date, datetime, time
 from justamodel.exceptions import ValidationError, ModelValidationError
@@ -137,6 +139,49 @@ class TestStringType(TestCase):
     def test_default_value(self):
         self.assertEqual('', StringType().default_value)
 
+    def test_validation_cache(self):
+        string_type = StringType(regex='@', cache_size=2)
+        string_type.regex = MagicMock(wraps=string_type.regex)
+        string_type.validate('a@b')
+        string_type.validate('a@b')
+        self.assertEqual(1, string_type.regex.search.call_count)
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}, string_type.validation_cache.info())
+
+        for _ in range(2):
+            with self.assertRaises(ValidationError):
+                string_type.validate('nothing')
+        self.assertEqual(3, string_type.regex.search.call_count)
+
+        string_type.validate('c@d')
+        string_type.validate('e@f')
+        string_type.validate('a@b')
+        self.assertEqual(6, string_type.regex.search.call_count)
+        self.assertEqual(2, string_type.validation_cache.info()['size'])
+
+        string_type.validation_cache.clear()
+        self.assertEqual({'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 2}, string_type.validation_cache.info())
+
+    def test_validation_cache_concurrent_eviction(self):
+        class EvictingDict(OrderedDict):
+            # Another thread evicting all values right after every lookup
+            def __contains__(self, value):
+                result = super().__contains__(value)
+                self.clear()
+                return result
+
+        string_type = StringType(regex='@', cache_size=2)
+        string_type.validate('a@b')
+        string_type.validation_cache._values = EvictingDict(string_type.validation_cache._values)
+        string_type.validate('a@b')
+        string_type.validate('c@d')
+
+    def test_validation_cache_checks_length(self):
+        string_type = StringType(max_length=3, cache_size=10)
+        string_type.validate('abc')
+        string_type.max_length = 2
+        with self.assertRaises(ValidationError):
+            string_type.validate('abc')
+
 
 class TestUrlType(TestCase):
     def test_validates_without_constraints(self):
@@ -166,6 +211,16 @@ class TestUrlType(TestCase):
         with self.assertRaises(ValidationError):
             url_type.validate('ftp://aaa')
 
+    def test_validation_cache(self):
+        url_type = UrlType(scheme='http', cache_size=10)
+        url_type.validate('http://abc')
+        url_type.validate('http://abc')
+        with self.assertRaises(ValidationError):
+            url_type.validate('https://abc')
+        with self.assertRaises(ValidationError):
+            url_type.validate('https://abc')
+        self.assertEqual({'hits': 1, 'misses': 3, 'size': 1, 'maxsize': 10}, url_type.validation_cache.info())
+
     def test_checks_scheme_parameter(self):
         UrlType()
         UrlType(scheme='abc')
@@ -401,6 +456,29 @@ class TestModelType(TestCase):
         self.assertIs(model_type.model_class, Model)
 
 
+class TestIterModels(TestCase):
+    def setUp(self):
+        class TestModel(Model):
+            pass
+
+        self.model_class = TestModel
+
+    def test_scalar_types(self):
+        self.assertFalse(IntType().contains_models)
+        self.assertFalse(ListType(IntType()).contains_models)
+        self.assertFalse(ListType().contains_models)
+        self.assertEqual([], list(ListType(IntType()).iter_models([1, 2])))
+
+    def test_model_types(self):
+        a, b, c = self.model_class(), self.model_class(), self.model_class()
+        self.assertTrue(ModelType(self.model_class).contains_models)
+        self.assertEqual([a], list(ModelType(self.model_class).iter_models(a)))
+        self.assertEqual([a, b], list(ListType(ModelType(self.model_class)).iter_models([a, None, b])))
+        self.assertEqual([c], list(DictType(StringType(), ListType(ModelType(self.model_class)))
+                                   .iter_models({'x': [c]})))
+        self.assertEqual([], list(ListType(ModelType(self.model_class)).iter_models('invalid')))
+
+
 class TestImportObject(TestCase):
     def test_import_object(self):
         date_type = import_object('justamodel.types.DateType')
@@ -417,6 +495,13 @@ class TestImportObject(TestCase):
         with self.assertRaises(AttributeError):
             import_object('this_does_not_exist')
 
+    def test_import_cached(self):
+        with patch('justamodel.types._imported_objects', {}), \
+                patch('justamodel.types.importlib.import_module', wraps=import_module) as import_mock:
+            import_object('justamodel.types.TimeType')
+            import_object('justamodel.types.TimeType')
+        self.assertEqual(3, import_mock.call_count)
+
 
 class TestDateType(TestCase):
     def test_default_value(self):
@@ -430,4 +515,76 @@ class TestDateTimeType(TestCase):
 
 class TestTimeType(TestCase):
     def test_default_value(self):
-        self.assertIsInstance(TimeType().default_value, TimeType().native_type)
\ No newline at end of file
+        self.assertIsInstance(TimeType().default_value, TimeType().native_type)
+
+
+class TestSampledValidation(TestCase):
+    def validated_items(self, value_type, value):
+        item_type = MagicMock()
+        if isinstance(value_type, DictType):
+            value_type.key_type = item_type
+        else:
+            value_type.item_type = item_type
+        value_type.validate(value)
+        return [call[0][0] for call in item_type.validate.call_args_list]
+
+    def test_rate(self):
+        list_type = ListType(sample=0.25, sample_seed=1)
+        items = self.validated_items(list_type, list(range(10)))
+        self.assertEqual(3, len(items))
+        self.assertEqual(sorted(items), items)
+        self.assertEqual({'validations': 1, 'items': 10, 'sampled': 3, 'sample': 0.25}, list_type.sampler.info())
+
+    def test_count(self):
+        list_type = ListType(sample=4, sample_seed=1)
+        self.assertEqual(4, len(self.validated_items(list_type, list(range(100)))))
+        self.assertEqual([0, 1], self.validated_items(list_type, [0, 1]))
+        self.assertEqual({'validations': 2, 'items': 102, 'sampled': 6, 'sample': 4}, list_type.sampler.info())
+
+        list_type.sampler.clear()
+        self.assertEqual({'validations': 0, 'items': 0, 'sampled': 0, 'sample': 4}, list_type.sampler.info())
+
+    def test_seed(self):
+        value = list(range(1000))
+        first = self.validated_items(ListType(sample=10, sample_seed=5), value)
+        self.assertEqual(first, self.validated_items(ListType(sample=10, sample_seed=5), value))
+        self.assertNotEqual(first, self.validated_items(ListType(sample=10, sample_seed=6), value))
+
+    def test_set_and_dict(self):
+        value = set(range(100))
+        items = self.validated_items(SetType(sample=0.1), value)
+        self.assertEqual(10, len(set(items)))
+        self.assertTrue(set(items) <= value)
+
+        value = {str(i): i for i in range(100)}
+        keys = self.validated_items(DictType(sample=5), value)
+        self.assertEqual(5, len(set(keys)))
+        self.assertTrue(set(keys) <= set(value))
+
+    def test_errors(self):
+        list_type = ListType(IntType(), sample=2, sample_seed=1)
+        with self.assertRaises(ModelValidationError) as e:
+            list_type.validate(['a', 'b', 'c'])
+        self.assertEqual(2, len(e.exception.sub_errors))
+
+        dict_type = DictType(StringType(), IntType(), sample=1, sample_seed=1)
+        with self.assertRaises(ModelValidationError) as e:
+            dict_type.validate({'a': 'x', 'b': 'y'})
+        self.assertEqual(1, len(e.exception.sub_errors))
+
+    def test_container_checks(self):
+        # Only items are sampled
+        with self.assertRaises(ValidationError):
+            ListType(IntType(), sample=1, max_length=2).validate([1, 2, 3])
+        with self.assertRaises(ValidationError):
+            SetType(IntType(), sample=1).validate([1])
+
+    def test_iter_items(self):
+        list_type = ListType(IntType(), sample=2, sample_seed=1)
+        self.assertEqual(2, len(list(list_type.iter_items([1, 2, 3, 4]))))
+        self.assertEqual(2, list_type.sampler.info()['sampled'])
+
+    def test_invalid_sample(self):
+        for sample in (0, -1, 0.0, 1.5, True, '1'):
+            with self.assertRaises(ValueError):
+                ListType(sample=sample)